@@ -0,0 +1,71 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from circuit import compile_circuit
+from qubit import Qubit
+from sampling import MeasurementDistribution
+
+# Chunks handed to each worker, more chunks than workers keeps them all busy
+# when circuits have very different lengths
+CHUNKS_PER_WORKER = 4
+
+
+class BatchResult:
+    """Results of run_batch, row i belongs to circuits[i]"""
+
+    def __init__(self, amplitudes, counts=None):
+        self.amplitudes = amplitudes  # (N, 2) complex final amplitudes
+        self.coords = np.stack(Qubit.amp_to_cartesian(amplitudes[:, 0], amplitudes[:, 1]), axis=-1)  # (N, 3)
+        self.counts = counts  # (N, 2) shots measured as |0> and |1>, or None without shots
+
+    def __len__(self):
+        return len(self.amplitudes)
+
+
+def _run_chunk(circuits, seeds, shots):
+    """Worker side: execute one chunk of circuits, returns compact arrays"""
+    amplitudes = np.empty((len(circuits), 2), dtype=np.complex128)
+    counts = np.zeros((len(circuits), 2), dtype=np.int64) if shots else None
+    for i, circuit in enumerate(circuits):
+        amplitudes[i] = compile_circuit(circuit).final_state()
+        if shots:
+            counts[i] = MeasurementDistribution.from_amplitudes(amplitudes[i]).sample(shots, seeds[i], counts=True)
+    return amplitudes, counts
+
+
+def run_batch(circuits, shots=0, seed=None, workers=None, chunk_size=None):
+    """Execute many independent single-qubit circuits across a process pool.
+
+    circuits:   list of circuits, each a list of gate tuples like [('H',), ('RX', angle)]
+    shots:      measurement shots per circuit, 0 to skip sampling
+    seed:       int/SeedSequence, or a list with one seed per circuit. Each circuit
+                gets its own stream, so results don't depend on workers or chunking.
+    workers:    process count, defaults to os.cpu_count(). 1 runs in this process.
+    chunk_size: circuits per task, defaults to spreading CHUNKS_PER_WORKER tasks per worker
+    """
+    circuits = list(circuits)
+    if isinstance(seed, (list, tuple, np.ndarray)):
+        assert len(seed) == len(circuits), "Need one seed per circuit"
+        seeds = list(seed)
+    else:
+        root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        seeds = root.spawn(len(circuits))
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-len(circuits) // (workers * CHUNKS_PER_WORKER)))
+    starts = range(0, len(circuits), chunk_size)
+    chunks = [(circuits[start:start + chunk_size], seeds[start:start + chunk_size], shots) for start in starts]
+
+    if workers == 1 or len(chunks) <= 1:
+        results = [_run_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map keeps results in submission order
+            results = list(executor.map(_run_chunk, *zip(*chunks)))
+
+    if not results:
+        return BatchResult(np.empty((0, 2), dtype=np.complex128), np.empty((0, 2), dtype=np.int64) if shots else None)
+    amplitudes = np.concatenate([result[0] for result in results])
+    counts = np.concatenate([result[1] for result in results]) if shots else None
+    return BatchResult(amplitudes, counts)
@@ -0,0 +1,432 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import numpy as np
+
+# Micro-benchmarks of the simulator and renderer hot paths.
+#
+#   python benchmark.py --out results.json
+#   python benchmark.py --save-baseline baseline.json
+#   python benchmark.py --baseline baseline.json --threshold 0.25
+#
+# Every benchmark returns the median seconds per call. With --baseline, any
+# benchmark slower than baseline * (1 + threshold) is reported and the exit
+# code is 1. A baseline file can hold per-benchmark thresholds under
+# "thresholds", e.g. {"on_draw_stubbed_gl": 0.5} for noisy ones.
+#
+# Benchmarks through main.py import it with pyglet's GL functions, window and
+# context stubbed out (see stub_gl), so they run headless with no display or
+# GL driver and measure only the Python work, e.g. of an on_draw frame. They
+# are skipped when pyglet itself can't be imported.
+
+DEFAULT_THRESHOLD = 0.2
+BENCHMARKS = {}
+
+
+class Skip(Exception):
+    """Raised by a benchmark's setup when it can't run here"""
+
+
+def benchmark(name):
+    """Register a setup function that returns the callable to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """Median and best seconds per call, with the loop count calibrated to take at least min_time"""
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    times = np.array(timer.repeat(repeat, number)) / number
+    return {'seconds': float(np.median(times)), 'best': float(times.min()), 'loops': number, 'repeat': repeat}
+
+
+def random_circuit(length, seed=0):
+    rng = np.random.default_rng(seed)
+    names = ['h', 'x', 'y', 'z', 's', 't', 'rx', 'ry', 'rz', 'p']
+    circuit = []
+    for name in rng.choice(names, length):
+        circuit.append((name, float(rng.uniform(0, 2 * np.pi))) if name in ('rx', 'ry', 'rz', 'p') else (name,))
+    return circuit
+
+
+# Simulator
+
+@benchmark('qubit_gates')
+def _qubit_gates():
+    """100 single-qubit gates on one Qubit"""
+    from qubit import Qubit
+    q = Qubit(1, 0)
+    def run():
+        for _ in range(25):
+            q.h()
+            q.t()
+            q.rx(0.3)
+            q.s()
+    return run
+
+
+@benchmark('qubit_coords_after_gate')
+def _qubit_coords_after_gate():
+    """One gate and the coords it returns, the visualizer's per-step pattern"""
+    from qubit import Qubit
+    q = Qubit(1, 0)
+    return q.h
+
+
+@benchmark('qubit_array_gates_1e5')
+def _qubit_array_gates():
+    from qubit_array import QubitArray
+    qubits = QubitArray.full(100000, 1, 0)
+    return lambda: qubits.h().rz(0.3).t()
+
+
+@benchmark('conversions_scalar')
+def _conversions_scalar():
+    """Every Qubit conversion once on scalars"""
+    from qubit import Qubit
+    def run():
+        theta, phi = Qubit.amp_to_spherical(0.6 + 0j, 0.8j)
+        x, y, z = Qubit.spherical_to_cartesian(theta, phi)
+        Qubit.cartesian_to_spherical(x, y, z)
+        Qubit.spherical_to_amp(theta, phi)
+        Qubit.amp_to_cartesian(0.6 + 0j, 0.8j)
+        Qubit.cartesian_to_amp(x, y, z)
+    return run
+
+
+@benchmark('conversions_vectorized_1e5')
+def _conversions_vectorized():
+    from qubit import Qubit
+    rng = np.random.default_rng(0)
+    amps = rng.normal(size=(2, 100000)) + 1j * rng.normal(size=(2, 100000))
+    amps /= np.linalg.norm(amps, axis=0)
+    def run():
+        x, y, z = Qubit.amp_to_cartesian(amps[0], amps[1])
+        Qubit.cartesian_to_amp(x, y, z)
+    return run
+
+
+@benchmark('step_amplitudes_10k')
+def _step_amplitudes():
+    from circuit import step_amplitudes
+    circuit = random_circuit(10000)
+    return lambda: step_amplitudes(circuit)
+
+
+@benchmark('compiled_final_state_10k')
+def _compiled_final_state():
+    from circuit import compile_circuit
+    circuit = random_circuit(10000)
+    return lambda: compile_circuit(circuit).final_state()
+
+
+@benchmark('checkpoint_seek')
+def _checkpoint_seek():
+    from checkpoints import CheckpointStore
+    store = CheckpointStore.from_circuit(random_circuit(100000))
+    indices = np.random.default_rng(0).integers(0, len(store), 64)
+    def run():
+        for index in indices:
+            store.seek(int(index))
+    return run
+
+
+# Animation math
+
+@benchmark('slerp_via_axis_scalar')
+def _slerp_scalar():
+    """One transition's worth of scalar slerps (50 frames)"""
+    from vector_utils import slerp_via_axis
+    ts = np.linspace(0.02, 1.0, 50).tolist()
+    def run():
+        for t in ts:
+            slerp_via_axis(0.0, 0.0, 1.0, 0.0, 0.0, -1.0, t, via_vector=(1.0, 0.0, 0.0))
+            slerp_via_axis(0.0, 0.0, 1.0, 0.6, 0.0, 0.8, t, via_vector=(1.0, 0.0, 0.0))
+    return run
+
+
+@benchmark('slerp_array_1000x64')
+def _slerp_array():
+    from vector_utils import slerp_via_axis_array
+    rng = np.random.default_rng(0)
+    start, end = rng.normal(size=(2, 1000, 3))
+    end[:100] = -start[:100]
+    t = np.linspace(0, 1, 64)
+    return lambda: slerp_via_axis_array(start, end, t, (1.0, 0.0, 0.0))
+
+
+# Geometry and headless rendering
+
+@benchmark('sphere_geometry_arrays')
+def _sphere_geometry_arrays():
+    from shapes import sphere_axes, sphere_circles
+    def run():
+        sphere_circles(1.0, 64)
+        sphere_axes(1.0)
+    return run
+
+
+@benchmark('arrow_vertices_1e4')
+def _arrow_vertices():
+    from shapes import arrow_vertices
+    vectors = np.random.default_rng(0).normal(size=(10000, 3))
+    return lambda: arrow_vertices(vectors)
+
+
+@benchmark('camera_project_labels')
+def _camera_project_labels():
+    from camera import Camera
+    camera = Camera()
+    state = {'rot_y': 0.0}
+    def run():
+        state['rot_y'] += 1.0
+        camera.update(20.0, state['rot_y'], 7.0, 0.0, 0.0, 800, 800)
+        return camera.project([(1.4, 0.0, 0.0), (0.0, 0.0, 1.4), (0.0, 1.4, 0.0)])
+    return run
+
+
+@benchmark('raster_frame')
+def _raster_frame():
+    from rasterizer import FrameRenderer
+    renderer = FrameRenderer()
+    return lambda: renderer.render((0.3, 0.2, 0.9), (0.9 + 0j, 0.1 + 0.2j))
+
+
+# GL side, through main.py with stubbed GL
+
+_main = None
+_main_error = None
+
+
+def _noop(*args, **kwargs):
+    return 0
+
+
+def _glGetIntegerv(pname, data):
+    # Only size limits are queried while building textures, report a generous one
+    if hasattr(data, 'value'):
+        data.value = 4096
+
+
+class StubWindow:
+    """Stands in for pyglet.window.Window, main.py creates one on import"""
+
+    def __init__(self, width=640, height=480, **kwargs):
+        self.width = width
+        self.height = height
+        self.invalid = True
+
+    def event(self, func):
+        return func
+
+    def close(self):
+        pass
+
+
+class StubContext:
+    """Current GL context for pyglet's font and texture code, every other call is a no-op"""
+    _workaround_vbo = True
+
+    def __init__(self):
+        import pyglet.gl.base
+        self.object_space = pyglet.gl.base.ObjectSpace()
+
+    def __getattr__(self, name):
+        return _noop
+
+
+def stub_gl():
+    """Replace pyglet's GL entry points, window and context before anything draws
+
+    Has to run before pyglet.graphics, pyglet.text and main are imported, since
+    they copy the GL functions with `from pyglet.gl import *`. Without a GL
+    context pyglet keeps vertex data in client-side arrays, so batches, labels
+    and on_draw run their full Python side with every GL call a no-op.
+    """
+    import types
+    import warnings
+    import pyglet
+    pyglet.options['shadow_window'] = False  # would open a window when pyglet.gl is imported
+    import pyglet.gl
+    import pyglet.window
+    warnings.filterwarnings('ignore', message="No GL context created yet")
+
+    modules = [module for name, module in list(sys.modules.items())
+               if module is not None and (name == 'pyglet.gl' or name.startswith('pyglet.gl.'))]
+    for module in modules:
+        for name, value in list(vars(module).items()):
+            if name.startswith('gl') and callable(value) and not isinstance(value, (type, types.ModuleType)):
+                setattr(module, name, _glGetIntegerv if name == 'glGetIntegerv' else _noop)
+    pyglet.window.Window = StubWindow
+    pyglet.gl.current_context = StubContext()
+
+
+def import_main():
+    """main.py imported against stubbed GL, or Skip when pyglet can't be imported here"""
+    global _main, _main_error
+    if _main is None and _main_error is None:
+        if any(name in sys.modules for name in ('main', 'pyglet.graphics', 'pyglet.text')):
+            _main_error = "pyglet was imported before its GL could be stubbed"
+        else:
+            try:
+                stub_gl()
+                import main
+                main.init_buttons()
+                main.on_resize(main.window.width, main.window.height)
+                _main = main
+            except Exception as e:
+                _main_error = f"pyglet unavailable: {e}"
+    if _main is None:
+        raise Skip(_main_error)
+    return _main
+
+
+@benchmark('execute_circuit_10k')
+def _execute_circuit():
+    main = import_main()
+    circuit = random_circuit(10000)
+    return lambda: main.execute_circuit(circuit)
+
+
+@benchmark('execute_circuit_final_only_10k')
+def _execute_circuit_final_only():
+    main = import_main()
+    circuit = random_circuit(10000)
+    return lambda: main.execute_circuit(circuit, final_only=True)
+
+
+@benchmark('label_construction')
+def _label_construction():
+    main = import_main()
+    import pyglet
+    def run():
+        batch = pyglet.graphics.Batch()
+        labels = [pyglet.text.Label(text, font_size=14, batch=batch) for text in 'XYZ']
+        labels.append(pyglet.text.Label(main.state_notation(0.6 + 0j, 0.8j, False), font_size=16, batch=batch))
+        for label in labels:
+            label.delete()
+    return run
+
+
+@benchmark('sphere_geometry_build')
+def _sphere_geometry_build():
+    import_main()
+    from geometry import BlochSphereGeometry
+    geometry = BlochSphereGeometry()
+    return lambda: geometry.build(1.0, 64)
+
+
+@benchmark('on_draw_stubbed_gl')
+def _on_draw_stubbed_gl():
+    """on_draw mid-transition with an orbiting camera, the busiest kind of frame"""
+    main = import_main()
+    main.seek(0)
+    def run():
+        main.rot_y += 0.5
+        main.interpolation_t = 0.0
+        main.transition_start = time.perf_counter() - main.transition_duration / 2
+        main.on_draw()
+    return run
+
+
+# Running and comparing
+
+def run_benchmarks(names=None, repeat=5, min_time=0.2):
+    """{'meta': ..., 'results': {name: {...}}, 'skipped': {name: reason}} for the selected benchmarks"""
+    results, skipped = {}, {}
+    for name, setup in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        try:
+            func = setup()
+        except Skip as e:
+            skipped[name] = str(e)
+            continue
+        results[name] = measure(func, repeat, min_time)
+    meta = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+    return {'meta': meta, 'results': results, 'skipped': skipped}
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """(name, ratio, allowed) of every benchmark slower than its baseline by more than its threshold"""
+    thresholds = baseline.get('thresholds', {})
+    regressions = []
+    for name, result in report['results'].items():
+        if name not in baseline.get('results', {}):
+            continue
+        ratio = result['seconds'] / baseline['results'][name]['seconds']
+        allowed = 1 + thresholds.get(name, threshold)
+        if ratio > allowed:
+            regressions.append((name, ratio, allowed))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulator and renderer micro-benchmarks")
+    parser.add_argument('names', nargs='*', help="only run benchmarks whose name contains one of these")
+    parser.add_argument('--out', help="write the JSON report here")
+    parser.add_argument('--baseline', help="JSON report to compare against")
+    parser.add_argument('--save-baseline', help="write the report as a new baseline, keeping its thresholds")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction, default %(default)s")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument('--list', action='store_true', help="list benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    report = run_benchmarks(args.names, args.repeat, args.min_time)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    for name, result in report['results'].items():
+        line = f"{name:34s} {result['seconds'] * 1e6:12.2f} us"
+        if baseline and name in baseline.get('results', {}):
+            line += f"   x{result['seconds'] / baseline['results'][name]['seconds']:.2f} vs baseline"
+        print(line)
+    for name, reason in report['skipped'].items():
+        print(f"{name:34s} skipped: {reason}")
+
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.save_baseline:
+        previous = {}
+        if os.path.exists(args.save_baseline):
+            with open(args.save_baseline) as file:
+                previous = json.load(file)
+        report_with_thresholds = dict(report, thresholds=previous.get('thresholds', {}))
+        with open(args.save_baseline, 'w') as file:
+            json.dump(report_with_thresholds, file, indent=2)
+
+    if baseline:
+        regressions = compare(report, baseline, args.threshold)
+        for name, ratio, allowed in regressions:
+            print(f"REGRESSION {name}: x{ratio:.2f} slower, allowed x{allowed:.2f}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
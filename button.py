@@ -4,7 +4,7 @@ from constants import WINDOW_WIDTH, WINDOW_HEIGHT
 
 
 class Button:
-    def __init__(self, x, y, width, height, text, action):
+    def __init__(self, x, y, width, height, text, action, batch=None, group=None):
         self.x = x
         self.y = y
         self.width = width
@@ -13,7 +13,7 @@ class Button:
         self.action = action
 
         try:
-            self.label = pyglet.text.Label(text, font_size=12, x=x + width//2, y=y + height//2, anchor_x='center', anchor_y='center', color=(255, 255, 255, 255))
+            self.label = pyglet.text.Label(text, font_size=12, x=x + width//2, y=y + height//2, anchor_x='center', anchor_y='center', color=(255, 255, 255, 255), batch=batch, group=group)
         except Exception as e:
             print(f"Error creating label. Skipping For now.")
         
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+def _rotation(angle_degrees, axis):
+    """4x4 rotation matrix, same as glRotatef(angle, *axis) for a unit axis"""
+    angle = np.radians(angle_degrees)
+    c, s = np.cos(angle), np.sin(angle)
+    x, y, z = axis
+    return np.array([
+        [x*x*(1-c) + c,   x*y*(1-c) - z*s, x*z*(1-c) + y*s, 0.0],
+        [y*x*(1-c) + z*s, y*y*(1-c) + c,   y*z*(1-c) - x*s, 0.0],
+        [x*z*(1-c) - y*s, y*z*(1-c) + x*s, z*z*(1-c) + c,   0.0],
+        [0.0,             0.0,             0.0,             1.0],
+    ])
+
+
+def _translation(x, y, z):
+    matrix = np.eye(4)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+
+def _perspective(fov_y, aspect, near, far):
+    """Same matrix as gluPerspective"""
+    f = 1.0 / np.tan(np.radians(fov_y) / 2)
+    return np.array([
+        [f / aspect, 0.0, 0.0, 0.0],
+        [0.0, f, 0.0, 0.0],
+        [0.0, 0.0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0.0, 0.0, -1.0, 0.0],
+    ])
+
+
+class Camera:
+    """Model-view and projection matrices of the orbit camera, kept on the CPU
+
+    Matrices use the column vector convention (point' = M @ point). They are
+    only rebuilt by update() when one of the camera parameters changes, and
+    `version` counts those rebuilds so callers can cache derived values.
+    """
+
+    def __init__(self, fov_y=45.0, near=0.1, far=100.0):
+        self.fov_y = fov_y
+        self.near = near
+        self.far = far
+        self.params = None
+        self.version = 0
+        self.modelview = np.eye(4)
+        self.projection = np.eye(4)
+        self.viewport = (0, 0, 1, 1)
+
+    def update(self, rot_x, rot_y, distance, pan_x, pan_y, width, height):
+        """Rebuild the matrices if anything changed, returns True when it did"""
+        params = (rot_x, rot_y, distance, pan_x, pan_y, width, height)
+        if params == self.params:
+            return False
+        self.params = params
+        self.version += 1
+        # Same order as glTranslatef(pan_x, pan_y, -distance); glRotatef(rot_x, 1, 0, 0); glRotatef(rot_y, 0, 1, 0)
+        self.modelview = _translation(pan_x, pan_y, -distance) @ _rotation(rot_x, (1.0, 0.0, 0.0)) @ _rotation(rot_y, (0.0, 1.0, 0.0))
+        self.projection = _perspective(self.fov_y, width / float(height or 1), self.near, self.far)
+        self.viewport = (0, 0, width, height)
+        return True
+
+    def project(self, points):
+        """(N, 3) world points -> (N, 2) window coordinates, like gluProject in one matrix multiply"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        homogeneous = np.concatenate((points, np.ones((len(points), 1))), axis=1)
+        clip = homogeneous @ (self.projection @ self.modelview).T
+        ndc = clip[:, :2] / clip[:, 3:4]
+        x, y, width, height = self.viewport
+        return np.stack((x + width * (ndc[:, 0] + 1) / 2, y + height * (ndc[:, 1] + 1) / 2), axis=-1)
+
+    def depth(self, points):
+        """Eye-space distance in front of the camera for each (N, 3) point"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        return -(points @ self.modelview[:3, :3].T + self.modelview[:3, 3])[:, 2]
+
+    def gl_matrix(self, matrix):
+        """Column-major flat list for glLoadMatrixd"""
+        return matrix.T.ravel().tolist()
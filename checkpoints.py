@@ -0,0 +1,150 @@
+import numpy as np
+from array import array
+
+from circuit import decode_matrices, encode_circuit, fuse_matrices
+from gates import GATE_NAMES
+from qubit import Qubit
+
+# Gates between two stored checkpoints, seek() replays at most this many
+DEFAULT_INTERVAL = 1024
+
+# Pseudo gate id for a measurement, its param holds the outcome (0 or 1)
+MEASURE_ID = 255
+assert MEASURE_ID >= len(GATE_NAMES)
+
+
+class CheckpointStore:
+    """Gate log of a single-qubit session with full amplitudes saved every `interval` gates
+
+    Step i is the state after the first i gates (step 0 is the initial state).
+    Gates are logged as 9 bytes each (uint8 id + float64 angle) and only every
+    interval-th state keeps its amplitudes, so memory grows as N/interval
+    states, and seek(i) replays fewer than `interval` gates from the nearest
+    checkpoint. The last step seeked is kept too, so stepping one step forward
+    or back applies or undoes a single gate instead.
+    """
+
+    def __init__(self, amp_a=1+0j, amp_b=0+0j, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self._gate_ids = array('B')
+        self._params = array('d')
+        self._checkpoints = array('d')  # real/imag pairs of (amp_a, amp_b) per checkpoint
+        self._current = np.array([amp_a, amp_b], dtype=np.complex128)
+        self._save_checkpoint()
+        self._cursor = (0, self._current)  # last step returned by seek() and its amplitudes
+
+    @classmethod
+    def from_circuit(cls, circuit, amp_a=1+0j, amp_b=0+0j, interval=DEFAULT_INTERVAL):
+        """Record a whole list of gate tuples, fusing each interval into one product"""
+        store = cls(amp_a, amp_b, interval)
+        ids, params = encode_circuit(circuit)
+        matrices = decode_matrices(ids, params)
+        store._gate_ids.frombytes(ids.tobytes())
+        store._params.frombytes(params.tobytes())
+        for start in range(0, len(ids), interval):
+            store._current = fuse_matrices(matrices[start:start + interval]) @ store._current
+            if start + interval <= len(ids):
+                store._save_checkpoint()
+        return store
+
+    def __len__(self):
+        """Number of steps, including the initial state"""
+        return len(self._gate_ids) + 1
+
+    def _save_checkpoint(self):
+        self._checkpoints.extend(self._current.view(np.float64).tolist())
+
+    def _log(self, gate_id, param):
+        self._gate_ids.append(gate_id)
+        self._params.append(param)
+        if len(self._gate_ids) % self.interval == 0:
+            self._save_checkpoint()
+
+    def record(self, gate_name, *params):
+        """Log one gate tuple like ('H',) or ('RX', angle) and apply it to the latest state"""
+        ids, angles = encode_circuit([(gate_name, *params)])
+        self._current = decode_matrices(ids, angles)[0] @ self._current
+        self._log(int(ids[0]), float(angles[0]))
+
+    def record_measurement(self, outcome):
+        """Log a measurement that collapsed the state to |outcome>"""
+        self._current = np.array([1, 0] if outcome == 0 else [0, 1], dtype=np.complex128)
+        self._log(MEASURE_ID, float(outcome))
+
+    def seek(self, index):
+        """(amp_a, amp_b) at step `index`, negative indices count from the end"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Step {index} out of range for {len(self)} steps")
+        if index == len(self) - 1:
+            vector = self._current
+        elif index % self.interval == 0:
+            # copied, the cursor must not hold a view that stops the log from growing
+            vector = np.frombuffer(self._checkpoints, dtype=np.complex128)[2*(index // self.interval):][:2].copy()
+        else:
+            vector = self._step_from_cursor(index)
+            if vector is None:
+                vector = self._replay(index)
+        self._cursor = (index, vector)
+        return (vector[0], vector[1])
+
+    def _step_from_cursor(self, index):
+        """Amplitudes at `index` by one gate from the cursor, None when it is further away"""
+        cursor, vector = self._cursor
+        if index == cursor:
+            return vector
+        if abs(index - cursor) != 1:
+            return None
+        gate = max(index, cursor) - 1  # the gate between the two steps
+        gate_id = self._gate_ids[gate]
+        if gate_id == MEASURE_ID:
+            if index < cursor:
+                return None  # a measurement can't be undone
+            return np.array([1, 0] if self._params[gate] == 0 else [0, 1], dtype=np.complex128)
+        matrix = decode_matrices(np.array([gate_id], dtype=np.uint8), np.array([self._params[gate]]))[0]
+        if index < cursor:
+            matrix = matrix.conj().T  # the inverse of a unitary
+        return matrix @ vector
+
+    def _replay(self, index):
+        """Amplitudes at `index` replayed from the checkpoint at or before it"""
+        checkpoint = index // self.interval
+        start = checkpoint * self.interval
+        checkpoints = np.frombuffer(self._checkpoints, dtype=np.complex128)
+        vector = checkpoints[2*checkpoint:2*checkpoint + 2].copy()
+
+        ids = np.frombuffer(self._gate_ids, dtype=np.uint8)[start:index]
+        params = np.frombuffer(self._params, dtype=np.float64)[start:index]
+        # A measurement restarts from its outcome, so only replay the gates after it
+        measured = np.flatnonzero(ids == MEASURE_ID)
+        if len(measured):
+            last = measured[-1]
+            vector = np.array([1, 0] if params[last] == 0 else [0, 1], dtype=np.complex128)
+            ids, params = ids[last + 1:], params[last + 1:]
+        if len(ids):
+            vector = fuse_matrices(decode_matrices(ids, params)) @ vector
+        return vector
+
+    def state(self, index):
+        """[x, y, z, phase] at step `index`, same layout as main.qubit_state"""
+        amp_a, amp_b = self.seek(index)
+        theta, phi = Qubit.amp_to_spherical(amp_a, amp_b)
+        x, y, z = Qubit.spherical_to_cartesian(theta, phi)
+        return [x, y, z, phi / (2 * np.pi)]
+
+    # Same read interface as tracefile.Trace, so main can view either
+
+    def __getitem__(self, index):
+        return self.state(index)
+
+    def amplitudes(self, index):
+        return self.seek(index)
+
+    def gate(self, index):
+        """Gate tuple that produced step `index` (index >= 1)"""
+        gate_id = self._gate_ids[index - 1]
+        if gate_id == MEASURE_ID:
+            return ('measure', int(self._params[index - 1]))
+        name = GATE_NAMES[gate_id]
+        return (name,) if np.isnan(self._params[index - 1]) else (name, self._params[index - 1])
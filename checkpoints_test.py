@@ -0,0 +1,49 @@
+import numpy as np
+
+from checkpoints import CheckpointStore
+from gates import gate_matrix
+
+
+def test_seek_after_measurement():
+    # interval 4 puts checkpoints before, at and after the measurement
+    store = CheckpointStore(interval=4)
+    vector = np.array([1, 0], dtype=np.complex128)
+    expected = [vector]
+    for gate_op in [('h',), ('t',), ('rx', 0.4), ('s',), ('h',), ('ry', 1.1)]:
+        store.record(*gate_op)
+        vector = gate_matrix(*gate_op) @ vector
+        expected.append(vector)
+    store.record_measurement(1)
+    vector = np.array([0, 1], dtype=np.complex128)
+    expected.append(vector)
+    for gate_op in [('h',), ('rz', 0.3), ('x',), ('t',), ('h',), ('p', 2.0), ('y',)]:
+        store.record(*gate_op)
+        vector = gate_matrix(*gate_op) @ vector
+        expected.append(vector)
+
+    assert len(store) == len(expected)
+    for index, amplitudes in enumerate(expected):
+        assert np.allclose(store.seek(index), amplitudes), f"Mismatch at step {index}"
+    assert np.allclose(store.seek(-1), expected[-1])
+    # stepping back one at a time undoes single gates, and replays across the measurement
+    for index in reversed(range(len(expected))):
+        assert np.allclose(store.seek(index), expected[index]), f"Mismatch stepping back to {index}"
+    assert np.allclose(store.seek(9), expected[9])
+    assert store.gate(7) == ('measure', 1)
+    assert store.gate(8) == ('h',)
+
+
+def test_from_circuit_matches_record():
+    circuit = [('h',), ('rx', 0.5), ('t',)] * 5
+    fused = CheckpointStore.from_circuit(circuit, interval=4)
+    recorded = CheckpointStore(interval=4)
+    for gate_op in circuit:
+        recorded.record(*gate_op)
+    for index in range(len(circuit) + 1):
+        assert np.allclose(fused.seek(index), recorded.seek(index))
+
+
+if __name__ == "__main__":
+    test_seek_after_measurement()
+    test_from_circuit_matches_record()
+    print("checkpoint tests passed")
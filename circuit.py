@@ -0,0 +1,114 @@
+import numpy as np
+from bisect import bisect_right
+
+from gates import BATCH_GATES, FIXED_GATES, GATE_IDS, GATE_NAMES, I
+
+# Longest run of gates fused into one matrix. Bounds how many gates state_at()
+# has to replay to rebuild an intermediate state.
+MAX_BLOCK_SIZE = 256
+
+
+def encode_circuit(circuit):
+    """Gate tuples -> (uint8 gate ids from gates.GATE_IDS, float64 angles, nan for fixed gates)"""
+    ids = np.empty(len(circuit), dtype=np.uint8)
+    params = np.full(len(circuit), np.nan)
+    for index, gate_op in enumerate(circuit):
+        name = gate_op[0].lower()
+        assert name in GATE_IDS, f"Unknown gate {gate_op[0]}"
+        ids[index] = GATE_IDS[name]
+        if name in BATCH_GATES:
+            assert len(gate_op) == 2, f"Gate {gate_op[0]} takes one angle, got {len(gate_op) - 1}"
+            params[index] = gate_op[1]
+    return ids, params
+
+
+def decode_matrices(ids, params):
+    """(len(ids), 2, 2) stack of gate matrices from encoded gate ids and angles
+
+    Parametric gates are built with one batched call per gate type instead of
+    one cached lookup per gate, since long circuits rarely repeat an angle.
+    """
+    ids = np.asarray(ids)
+    matrices = np.empty((len(ids), 2, 2), dtype=np.complex128)
+    for gate_id in np.unique(ids):
+        name = GATE_NAMES[gate_id]
+        mask = ids == gate_id
+        if name in FIXED_GATES:
+            matrices[mask] = FIXED_GATES[name]
+        else:
+            matrices[mask] = BATCH_GATES[name](params[mask])
+    return matrices
+
+
+def gate_matrices(circuit):
+    """(len(circuit), 2, 2) stack of the matrices of a list of gate tuples"""
+    return decode_matrices(*encode_circuit(circuit))
+
+
+def step_amplitudes(circuit, amp_a=1+0j, amp_b=0+0j):
+    """(len(circuit) + 1, 2) amplitudes of every intermediate state, row 0 is the initial state"""
+    amplitudes = np.empty((len(circuit) + 1, 2), dtype=np.complex128)
+    amplitudes[0] = (amp_a, amp_b)
+    for index, matrix in enumerate(gate_matrices(circuit)):
+        amplitudes[index + 1] = matrix @ amplitudes[index]
+    return amplitudes
+
+
+def fuse_matrices(matrices):
+    """Multiply a (k, 2, 2) stack into the single matrix m[k-1] @ ... @ m[0]"""
+    while len(matrices) > 1:
+        if len(matrices) % 2:
+            matrices = np.concatenate((matrices, I[np.newaxis]))
+        # later gates multiply from the left
+        matrices = matrices[1::2] @ matrices[0::2]
+    return matrices[0]
+
+
+class CompiledCircuit:
+    '''
+    A single-qubit circuit with consecutive gates fused into 2x2 blocks.
+
+    Block i covers the original gates starts[i] <= index < starts[i+1], so any
+    intermediate state can still be rebuilt by replaying part of one block.
+    '''
+
+    def __init__(self, circuit, max_block_size=MAX_BLOCK_SIZE):
+        self.circuit = list(circuit)
+        self.max_block_size = max_block_size
+        self.gate_matrices = gate_matrices(self.circuit)
+        self.starts = list(range(0, len(self.circuit), max_block_size))
+        self.blocks = [fuse_matrices(self.gate_matrices[start:start + max_block_size]) for start in self.starts]
+
+    def __len__(self):
+        return len(self.circuit)
+
+    def run(self, qubit):
+        """Apply every fused block to a Qubit, one update per block instead of per gate"""
+        for block in self.blocks:
+            qubit.apply(block)
+        return qubit
+
+    def final_state(self, amp_a=1+0j, amp_b=0+0j):
+        """Amplitudes after the whole circuit, starting from (amp_a, amp_b)"""
+        vector = np.array([amp_a, amp_b], dtype=np.complex128)
+        for block in self.blocks:
+            vector = block @ vector
+        return (vector[0], vector[1])
+
+    def state_at(self, index, amp_a=1+0j, amp_b=0+0j):
+        """Amplitudes after the first `index` gates (0 is the initial state)"""
+        assert 0 <= index <= len(self.circuit), f"Gate index {index} out of range for {len(self.circuit)} gates"
+        vector = np.array([amp_a, amp_b], dtype=np.complex128)
+        # Whole blocks that end at or before index, then replay the rest
+        block_index = bisect_right(self.starts, index) - 1
+        for block in self.blocks[:max(block_index, 0)]:
+            vector = block @ vector
+        if block_index >= 0:
+            for matrix in self.gate_matrices[self.starts[block_index]:index]:
+                vector = matrix @ vector
+        return (vector[0], vector[1])
+
+
+def compile_circuit(circuit, max_block_size=MAX_BLOCK_SIZE):
+    """Fuse a list of gate tuples like [('H',), ('RX', angle)] into a CompiledCircuit"""
+    return CompiledCircuit(circuit, max_block_size)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from circuit import compile_circuit, step_amplitudes
+from gates import gate_matrix
+from qubit import Qubit
+
+
+def random_circuit(length, seed=0):
+    rng = np.random.default_rng(seed)
+    circuit = []
+    for name in rng.choice(['h', 'x', 'y', 'z', 's', 't', 'rx', 'ry', 'rz', 'p'], length):
+        circuit.append((name, rng.uniform(0, 2 * np.pi)) if name in ('rx', 'ry', 'rz', 'p') else (name,))
+    return circuit
+
+
+def stepwise_amplitudes(circuit, amp_a=1+0j, amp_b=0+0j):
+    """Amplitudes after every gate, applied one at a time to a Qubit"""
+    q = Qubit(amp_a, amp_b)
+    amplitudes = [(q.amp_a, q.amp_b)]
+    for gate_op in circuit:
+        q.apply(gate_matrix(*gate_op))
+        amplitudes.append((q.amp_a, q.amp_b))
+    return np.array(amplitudes)
+
+
+def test_state_at_matches_stepwise():
+    # Block size 16 puts steps at, before and after block boundaries
+    circuit = random_circuit(100)
+    compiled = compile_circuit(circuit, max_block_size=16)
+    expected = stepwise_amplitudes(circuit)
+    for index in range(len(circuit) + 1):
+        assert np.allclose(compiled.state_at(index), expected[index]), f"Mismatch at step {index}"
+
+
+def test_final_state_and_run_match_stepwise():
+    circuit = random_circuit(1000, seed=1)
+    start = (np.sqrt(0.5), 1j * np.sqrt(0.5))
+    compiled = compile_circuit(circuit)
+    expected = stepwise_amplitudes(circuit, *start)[-1]
+    assert np.allclose(compiled.final_state(*start), expected)
+    q = compiled.run(Qubit(*start))
+    assert np.allclose((q.amp_a, q.amp_b), expected)
+
+
+def test_step_amplitudes_matches_stepwise():
+    circuit = random_circuit(200, seed=2)
+    assert np.allclose(step_amplitudes(circuit), stepwise_amplitudes(circuit))
+
+
+if __name__ == "__main__":
+    test_state_at_matches_stepwise()
+    test_final_state_and_run_match_stepwise()
+    test_step_amplitudes_matches_stepwise()
+    print("circuit tests passed")
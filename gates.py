@@ -0,0 +1,84 @@
+import numpy as np
+from functools import lru_cache
+
+# Number of distinct angles kept per parametric gate
+PARAMETRIC_CACHE_SIZE = 1024
+
+
+def _read_only(rows):
+    matrix = np.array(rows, dtype=np.complex128)
+    matrix.flags.writeable = False  # shared between every caller, never mutate
+    return matrix
+
+
+# FIXED GATES
+I = _read_only([[1, 0], [0, 1]])
+H = _read_only(1/np.sqrt(2) * np.array([[1, 1], [1, -1]]))
+X = _read_only([[0, 1], [1, 0]])
+Y = _read_only([[0, -1j], [1j, 0]])
+Z = _read_only([[1, 0], [0, -1]])
+S = _read_only([[1, 0], [0, 1j]])
+T = _read_only([[1, 0], [0, np.exp(1j*np.pi/4)]])
+
+
+# PARAMETRIC GATES, vectorized over any array of angles -> (..., 2, 2)
+def p_matrices(angles):
+    angles = np.asarray(angles, dtype=np.float64)
+    matrices = np.zeros(angles.shape + (2, 2), dtype=np.complex128)
+    matrices[..., 0, 0] = 1
+    matrices[..., 1, 1] = np.exp(1j*angles)
+    return matrices
+
+def rx_matrices(angles):
+    angles = np.asarray(angles, dtype=np.float64)
+    c, s = np.cos(angles/2), np.sin(angles/2)
+    return np.stack((np.stack((c, -1j*s), axis=-1), np.stack((-1j*s, c), axis=-1)), axis=-2)
+
+def ry_matrices(angles):
+    angles = np.asarray(angles, dtype=np.float64)
+    c, s = np.cos(angles/2), np.sin(angles/2)
+    return np.stack((np.stack((c, -s), axis=-1), np.stack((s, c), axis=-1)), axis=-2).astype(np.complex128)
+
+def rz_matrices(angles):
+    angles = np.asarray(angles, dtype=np.float64)
+    matrices = np.zeros(angles.shape + (2, 2), dtype=np.complex128)
+    matrices[..., 0, 0] = np.exp(-0.5j*angles)
+    matrices[..., 1, 1] = np.exp(0.5j*angles)
+    return matrices
+
+
+# PARAMETRIC GATES, single angle, cached
+def _cached(batch_builder):
+    @lru_cache(maxsize=PARAMETRIC_CACHE_SIZE)
+    def builder(angle):
+        matrix = batch_builder(angle)
+        matrix.flags.writeable = False
+        return matrix
+    builder.__name__ = batch_builder.__name__.replace('_matrices', '')
+    return builder
+
+p = _cached(p_matrices)
+rx = _cached(rx_matrices)
+ry = _cached(ry_matrices)
+rz = _cached(rz_matrices)
+
+
+FIXED_GATES = {'i': I, 'h': H, 'x': X, 'y': Y, 'z': Z, 's': S, 't': T}
+PARAMETRIC_GATES = {'p': p, 'rx': rx, 'ry': ry, 'rz': rz}
+BATCH_GATES = {'p': p_matrices, 'rx': rx_matrices, 'ry': ry_matrices, 'rz': rz_matrices}
+
+# Stable numeric ids for compact gate logs and trace files, only ever append
+GATE_NAMES = ('i', 'h', 'x', 'y', 'z', 's', 't', 'p', 'rx', 'ry', 'rz')
+GATE_IDS = {name: gate_id for gate_id, name in enumerate(GATE_NAMES)}
+
+
+def gate_matrix(gate_name, *params):
+    """Resolve a gate tuple like ('H',) or ('RX', angle) to its 2x2 matrix"""
+    name = gate_name.lower()
+    matrix = FIXED_GATES.get(name)
+    if matrix is not None:
+        return matrix
+    builder = PARAMETRIC_GATES.get(name)
+    assert builder is not None, f"Unknown gate {gate_name}"
+    assert len(params) == 1, f"Gate {gate_name} takes one angle, got {len(params)}"
+    return builder(float(params[0]))
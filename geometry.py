@@ -0,0 +1,166 @@
+import numpy as np
+import pyglet
+from pyglet.gl import *
+
+from heatmap import density_colors
+from shapes import ARROW_COLOR, ARROW_WIDTH, AXIS_WIDTH, CIRCLE_WIDTH, arrow_vertices, sphere_axes, sphere_circles
+
+
+class LineWidthGroup(pyglet.graphics.OrderedGroup):
+    """Draws its vertex lists with a fixed line width, in `order`"""
+
+    def __init__(self, width, order, parent=None):
+        super().__init__(order, parent)
+        self.width = width
+
+    def set_state(self):
+        glLineWidth(self.width)
+
+
+class BlendGroup(pyglet.graphics.OrderedGroup):
+    """Translucent surfaces: alpha blending on and no depth writes, so lines behind stay visible"""
+
+    def set_state(self):
+        glPushAttrib(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glDepthMask(GL_FALSE)
+
+    def unset_state(self):
+        glPopAttrib()
+
+
+def write_span(vertex_list, attribute_name, first_vertex, data):
+    """Overwrite part of one attribute of a vertex list, from `first_vertex` on.
+    Only that byte range is marked dirty, so just it gets re-uploaded with glBufferSubData,
+    where the vertex_list.vertices/colors accessors would invalidate the whole list.
+    """
+    data = np.asarray(data).ravel()
+    attribute = vertex_list.domain.attribute_names[attribute_name]
+    region = attribute.get_region(attribute.buffer, vertex_list.start + first_vertex, len(data) // attribute.count)
+    np.ctypeslib.as_array(region.array)[:] = data
+    region.invalidate()
+
+
+class BlochSphereGeometry:
+    """Static Bloch sphere wireframe and axes, built once into one Batch
+
+    The vertices only depend on the radius and segment count, so they are
+    rebuilt when those change and every other frame is a single batch.draw().
+    """
+
+    def __init__(self):
+        self.batch = None
+        self.key = None
+        self._circle_group = LineWidthGroup(CIRCLE_WIDTH, 0)
+        self._axis_group = LineWidthGroup(AXIS_WIDTH, 1)
+
+    def build(self, radius=1.0, segments=64):
+        self.batch = pyglet.graphics.Batch()
+        self.key = (radius, segments)
+
+        vertices, colors = sphere_circles(radius, segments)
+        self.batch.add(len(vertices), GL_LINES, self._circle_group,
+                       ('v3f/static', vertices.ravel().tolist()), ('c3f/static', colors.ravel().tolist()))
+
+        vertices, colors = sphere_axes(radius)
+        self.batch.add(len(vertices), GL_LINES, self._axis_group,
+                       ('v3f/static', vertices.ravel().tolist()), ('c3f/static', colors.ravel().tolist()))
+
+    def draw(self, radius=1.0, segments=64):
+        if self.key != (radius, segments):
+            self.build(radius, segments)
+        self.batch.draw()
+
+
+class VectorArrows:
+    """Any number of Bloch vector arrows in one vertex list, drawn with one batch.draw()
+
+    Each arrow is 6 GL_LINES vertices. update() compares against the vectors
+    already on the GPU and only recomputes and re-uploads the span of arrows
+    that changed, so moving a few vectors of a large ensemble stays cheap.
+    """
+
+    def __init__(self, color=ARROW_COLOR, width=ARROW_WIDTH, order=2):
+        self.color = color
+        self.batch = pyglet.graphics.Batch()
+        self.vectors = np.zeros((0, 3))
+        self._group = LineWidthGroup(width, order)
+        self._vertex_list = None
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def set_vectors(self, vectors, colors=None):
+        """Replace every vector with an (N, 3) array, optionally with (N, 3) RGB colors"""
+        vectors = np.array(vectors, dtype=np.float64).reshape(-1, 3)
+        if colors is None:
+            colors = np.tile(self.color, (len(vectors), 1))
+        colors = np.repeat(np.asarray(colors, dtype=np.float64).reshape(-1, 3), 6, axis=0)
+        if self._vertex_list is not None:
+            self._vertex_list.delete()
+            self._vertex_list = None
+        self.vectors = vectors
+        if len(vectors):
+            self._vertex_list = self.batch.add(6 * len(vectors), GL_LINES, self._group,
+                                               ('v3f/dynamic', arrow_vertices(vectors).ravel().tolist()),
+                                               ('c3f/static', colors.ravel().tolist()))
+
+    def update(self, vectors, indices=None):
+        """Move arrows to new vectors, either all N of them or the ones at `indices`"""
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, 3)
+        if indices is None:
+            if len(vectors) != len(self.vectors):
+                self.set_vectors(vectors)
+                return
+            indices = np.flatnonzero(np.any(vectors != self.vectors, axis=-1))
+            vectors = vectors[indices]
+        else:
+            indices = np.asarray(indices).reshape(-1)
+        if len(indices) == 0:
+            return
+
+        self.vectors[indices] = vectors
+        # Re-upload only the contiguous span covering the changed arrows
+        first, last = int(indices.min()), int(indices.max()) + 1
+        write_span(self._vertex_list, 'vertices', 6 * first, arrow_vertices(self.vectors[first:last]))
+
+    def draw(self):
+        self.batch.draw()
+
+
+class DensityOverlay:
+    """heatmap.SphereHistogram drawn as translucent colored quads on the Bloch sphere
+
+    The bin quads never move, so only colors are uploaded again. Counts are
+    colored against a scale that doubles when the busiest bin outgrows it,
+    so a streaming update recolors just the bins it touched, except for the
+    few updates that cross a power of two.
+    """
+
+    def __init__(self, histogram, radius=1.005, order=-1):
+        self.histogram = histogram
+        self.batch = pyglet.graphics.Batch()
+        self.scale = 1
+        corners = histogram.bin_corners(radius)[..., [0, 2, 1]]  # to GL space
+        colors = density_colors(histogram.counts, self.scale)
+        self._vertex_list = self.batch.add(4 * len(histogram), GL_QUADS, BlendGroup(order),
+                                           ('v3f/static', corners.ravel().tolist()),
+                                           ('c4f/dynamic', np.repeat(colors, 4, axis=0).ravel().tolist()))
+        self.update()
+
+    def update(self):
+        """Recolor the bins the histogram changed since the last update"""
+        changed = self.histogram.take_changed()
+        peak = int(self.histogram.counts.max()) if len(self.histogram) else 0
+        if peak > self.scale:
+            self.scale = 1 << (peak - 1).bit_length()  # next power of two
+            changed = np.arange(len(self.histogram))
+        if len(changed) == 0:
+            return
+        first, last = int(changed.min()), int(changed.max()) + 1
+        colors = density_colors(self.histogram.counts[first:last], self.scale)
+        write_span(self._vertex_list, 'colors', 4 * first, np.repeat(colors, 4, axis=0))
+
+    def draw(self):
+        self.batch.draw()
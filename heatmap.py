@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class SphereHistogram:
+    """Equal-area histogram of Bloch vectors on the unit sphere
+
+    By Archimedes' hat-box theorem, equal steps in z cover equal areas of the
+    sphere, so bins uniform in z and in phi = atan2(y, x) all have area
+    4*pi / n_bins and raw counts compare directly as densities. add() is one
+    vectorized bincount per batch, and histograms built by parallel workers
+    are combined with merge().
+
+    Bins touched since the last take_changed() are tracked so a renderer can
+    re-upload only those.
+    """
+
+    def __init__(self, n_z=32, n_phi=64):
+        self.n_z = n_z
+        self.n_phi = n_phi
+        self.counts = np.zeros(n_z * n_phi, dtype=np.int64)  # bin iz * n_phi + iphi
+        self.total = 0
+        self.changed = np.zeros(n_z * n_phi, dtype=bool)
+
+    @classmethod
+    def from_coords(cls, coords, n_z=32, n_phi=64):
+        histogram = cls(n_z, n_phi)
+        histogram.add(coords)
+        return histogram
+
+    def __len__(self):
+        return len(self.counts)
+
+    @property
+    def bin_area(self):
+        return 4 * np.pi / len(self.counts)
+
+    def bin_index(self, coords):
+        """Flat bin of each (N, 3) Bloch vector, e.g. QubitArray.coords or BatchResult.coords"""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+        r = np.linalg.norm(coords, axis=-1)
+        z = np.divide(coords[:, 2], r, out=np.ones_like(r), where=r > 1e-10)  # zero vectors count as |0>
+        phi = np.arctan2(coords[:, 1], coords[:, 0]) % (2 * np.pi)
+        iz = np.clip(((z + 1) / 2 * self.n_z).astype(np.int64), 0, self.n_z - 1)
+        iphi = np.clip((phi / (2 * np.pi) * self.n_phi).astype(np.int64), 0, self.n_phi - 1)
+        return iz * self.n_phi + iphi
+
+    def add(self, coords):
+        """Accumulate a batch of (N, 3) Bloch vectors"""
+        counts = np.bincount(self.bin_index(coords), minlength=len(self.counts))
+        self._add_counts(counts)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another histogram with the same bins, e.g. from another worker"""
+        assert (self.n_z, self.n_phi) == (other.n_z, other.n_phi), "Can only merge histograms with the same bins"
+        self._add_counts(other.counts)
+        return self
+
+    def _add_counts(self, counts):
+        self.counts += counts
+        self.total += int(counts.sum())
+        self.changed |= counts != 0
+
+    def take_changed(self):
+        """Indices of the bins changed since the last call, and reset the tracking"""
+        changed = np.flatnonzero(self.changed)
+        self.changed[:] = False
+        return changed
+
+    def clear(self):
+        self.changed |= self.counts != 0
+        self.counts[:] = 0
+        self.total = 0
+
+    def density(self):
+        """Probability density per unit area of every bin, integrates to 1 over the sphere"""
+        if self.total == 0:
+            return np.zeros(len(self.counts))
+        return self.counts / (self.total * self.bin_area)
+
+    def to_grid(self):
+        """Counts as an (n_z, n_phi) grid, rows from the south (z = -1) to the north pole"""
+        return self.counts.reshape(self.n_z, self.n_phi)
+
+    def bin_corners(self, radius=1.0):
+        """(n_bins, 4, 3) corners of every bin in Bloch coordinates, going around the bin"""
+        z = np.linspace(-1.0, 1.0, self.n_z + 1)
+        phi = np.linspace(0.0, 2 * np.pi, self.n_phi + 1)
+        z0, phi0 = np.meshgrid(z[:-1], phi[:-1], indexing='ij')
+        z1, phi1 = np.meshgrid(z[1:], phi[1:], indexing='ij')
+        zs = np.stack((z0, z0, z1, z1), axis=-1).reshape(-1, 4)
+        phis = np.stack((phi0, phi1, phi1, phi0), axis=-1).reshape(-1, 4)
+        rho = np.sqrt(np.clip(1 - zs * zs, 0.0, 1.0))
+        return radius * np.stack((rho * np.cos(phis), rho * np.sin(phis), zs), axis=-1)
+
+
+def density_colors(counts, scale, alpha=0.6):
+    """(N, 4) RGBA heat colors for bin counts, 0 is fully transparent and `scale` is the hottest
+
+    Runs from blue through red to yellow, with opacity growing with the count.
+    """
+    level = np.clip(np.asarray(counts, dtype=np.float64) / max(scale, 1), 0.0, 1.0)
+    red = np.clip(2 * level, 0.0, 1.0)
+    green = np.clip(2 * level - 1, 0.0, 1.0)
+    blue = np.clip(1 - 2 * level, 0.0, 1.0)
+    opacity = np.where(level > 0, alpha * (0.25 + 0.75 * level), 0.0)
+    return np.stack((red, green, blue, opacity), axis=-1)
@@ -0,0 +1,55 @@
+import numpy as np
+
+
+class StateHistory:
+    """Growable, contiguous (N, 4) float64 history of [x, y, z, phase] states
+
+    Rows live in one array that doubles in capacity when full, so appends are
+    amortized O(1) and every step costs 32 bytes instead of a list of boxed floats.
+    Returned by main.execute_circuit for scripts that want every state at once.
+    The viewer itself steps through a checkpoints.CheckpointStore instead.
+    """
+
+    def __init__(self, states=(), capacity=64):
+        self._data = np.empty((max(capacity, 1), 4), dtype=np.float64)
+        self._size = 0
+        self.extend(states)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(f"State index {index} out of range for {self._size} states")
+        return self._data[index]
+
+    def __iter__(self):
+        return iter(self._data[:self._size])
+
+    def _reserve(self, size):
+        if size > len(self._data):
+            capacity = len(self._data)
+            while capacity < size:
+                capacity *= 2
+            data = np.empty((capacity, 4), dtype=np.float64)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+
+    def append(self, state):
+        """Add one [x, y, z, phase] state"""
+        self._reserve(self._size + 1)
+        self._data[self._size] = state
+        self._size += 1
+
+    def extend(self, states):
+        """Add many states at once from any (M, 4) array-like"""
+        states = np.asarray(states, dtype=np.float64).reshape(-1, 4)
+        self._reserve(self._size + len(states))
+        self._data[self._size:self._size + len(states)] = states
+        self._size += len(states)
+
+    def to_array(self):
+        """Copy of every recorded state as an (N, 4) array"""
+        return self._data[:self._size].copy()
@@ -1,16 +1,25 @@
 import pyglet
 from pyglet.gl import *
 from pyglet.window import key, mouse
-import math
 import threading
 import os
+import sys
 import time
 import numpy as np
 
-from vector_utils import slerp_via_axis
-from button import Button
+from vector_utils import slerp_trajectory
 from constants import WINDOW_WIDTH, WINDOW_HEIGHT
 from qubit import Qubit
+from gates import gate_matrix
+from circuit import compile_circuit
+from history import StateHistory
+from checkpoints import CheckpointStore
+from tracefile import open_trace
+from geometry import BlochSphereGeometry, DensityOverlay, VectorArrows
+from camera import Camera
+from toolbar import Toolbar
+from notation import state_notation
+from profiling import Profiler
 
 # Window item for our pyglet's "base" to work off of!
 window = pyglet.window.Window(width=WINDOW_WIDTH, height=WINDOW_HEIGHT, caption='Pyglet 3D Example', resizable=False)
@@ -37,73 +46,105 @@ target_x = vector_x
 target_y = vector_y
 target_z = vector_z
 
-interpolation_speed = 0.02
+interpolation_speed = 0.02  # progress per frame of the original 30 Hz animation
 interpolation_t = 1.0  # Interpolation parameter (0 to 1)
 rotation_phase = 0.0  # Phase between X (0.0) and Y (1.0) axis
 
+# Transitions are sampled once into a trajectory and played back on wall-clock time,
+# so they look the same at any frame rate
+TRAJECTORY_SAMPLES = 256
+transition_duration = 1.0 / (interpolation_speed * 30)  # seconds
+transition_start = 0.0
+trajectory = np.array([[vector_x, vector_y, vector_z]])
+
+
+def transition_easing(samples):
+    """Progress along the path at `samples` evenly spaced times of a transition.
+    Matches the old animation, which slerped from the current vector with t += interpolation_speed
+    every frame, so each frame removed a fraction t of the remaining angle (an ease-out).
+    """
+    steps = np.minimum(1.0, interpolation_speed * np.arange(1, int(np.ceil(1.0 / interpolation_speed)) + 1))
+    progress = np.concatenate(([0.0], 1.0 - np.cumprod(1.0 - steps)))
+    return np.interp(np.linspace(0.0, 1.0, samples), np.linspace(0.0, 1.0, len(progress)), progress)
+
+transition_progress = transition_easing(TRAJECTORY_SAMPLES)
+
 # State management
 quantum_circuit = Qubit(1,0)  # Initialize to |0> state
-states_list = [[0.0, 0.0, 1.0, 0.0]]  # Generated from circuit execution
+# Recorded steps: the session's gate log, or a memory-mapped trace file when replaying.
+# Both index to [x, y, z, phase] and rebuild a step on demand instead of keeping them all.
+steps = CheckpointStore()
 current_state_index = 0
 is_measured = False  # Track if circuit has been measured
+is_replaying = False  # steps is a read-only trace file
+
+toolbar = Toolbar()  # every button in one batch, hit-tested through a grid index
+gate_buttons = []  # toolbar indices hidden once the circuit is measured
+sphere_geometry = BlochSphereGeometry()  # static wireframe, built on first draw
+camera = Camera()  # CPU copy of the view matrices, rebuilt only when the view changes
+state_arrow = VectorArrows()  # the animated state vector
+ensemble_arrows = VectorArrows(color=(0.3, 0.8, 1.0), width=1.5)  # optional cloud of vectors, see show_ensemble
+density_overlay = None  # optional heat map on the sphere, see show_density
+_ticking = False  # update() is scheduled while a transition animates
+
+# Opt-in timing of the on_draw stages and the gate path, toggled with P or on from
+# the start with BLOCH_PROFILE=1. BLOCH_PROFILE_CSV=path writes the samples on exit.
+profiler = Profiler()
+profiler.wrap(sys.modules[__name__], 'apply_gate')
+profiler.wrap(Qubit, 'apply', 'Qubit.apply')
+profiler.wrap(Qubit, '_Qubit__update', 'Qubit.__update')
+profile_label = None  # p50/p99 overlay, only exists while profiling
+
+
+def qubit_state(q):
+    """[x, y, z, phase] snapshot of a qubit, the layout of every recorded step"""
+    x, y, z = q.coords
+    phase = q.phi / (2 * np.pi)  # Normalize phase to [0, 1]
+    return [x, y, z, phase]
 
-buttons = []
-
-
-def execute_circuit(circuit):
-    """Execute quantum circuit and return list of states [x, y, z, phase]"""
-    states = []
+def execute_circuit(circuit, final_only=False):
+    """Execute quantum circuit on a fresh qubit and return a StateHistory of [x, y, z, phase] states
+    With final_only, gates are fused first and only the final state is returned.
+    See batch.run_batch for running many circuits at once.
+    """
     q = Qubit(1, 0)  # Initialize to |0> state
     
+    if final_only:
+        return StateHistory([qubit_state(compile_circuit(circuit).run(q))])
+    
     # Add initial state
-    x, y, z = q.coords
-    phase = q.phi / (2 * np.pi)  # Normalize phase to [0, 1]
-    states.append([x, y, z, phase])
+    states = StateHistory([qubit_state(q)], capacity=len(circuit) + 1)
     
     # Execute each gate and capture state
     for gate_op in circuit:
-        gate_name = gate_op[0]
-        states.append(apply_gate(gate_name))
+        q.apply(gate_matrix(*gate_op))
+        states.append(qubit_state(q))
     
     return states
 
-def apply_gate(gate_name): 
-    if gate_name.lower() == 'h':
-        quantum_circuit.h()
-    elif gate_name.lower() == 'x':
-        quantum_circuit.x()
-    elif gate_name.lower() == 'z':
-        quantum_circuit.z()
-    elif gate_name.lower() == 's':
-        quantum_circuit.s()
-    elif gate_name.lower() == 't':
-        quantum_circuit.t()
+def apply_gate(gate_name, *params):
+    """Apply a gate tuple like ('H',) or ('RX', angle), resolved through the gate registry"""
+    quantum_circuit.apply(gate_matrix(gate_name, *params))
     
     # Capture state after gate
-    x, y, z = Qubit.amp_to_cartesian(quantum_circuit.amp_a, quantum_circuit.amp_b)
-    phase = quantum_circuit.phi / (2 * np.pi)  # Normalize phase to [0, 1]
-    return [x, y, z, phase]
+    return qubit_state(quantum_circuit)
 
 def reset_circuit():
-    global quantum_circuit, states_list, current_state_index, is_measured, target_x, target_y, target_z, rotation_phase, interpolation_t
+    global quantum_circuit, steps, current_state_index, is_measured, is_replaying
     quantum_circuit = Qubit(1, 0)  # Reset to |0> state
-    states_list = [[0.0, 0.0, 1.0, 0.0]]
+    is_replaying = False
+    steps = CheckpointStore()
     current_state_index = 0
     is_measured = False  # Reset measurement flag
+    update_gate_buttons()
     
     # Reset to initial state
-    with vector_lock:
-        target_x = 0.0
-        target_y = 0.0
-        target_z = 1.0
-        rotation_phase = 0.0
-        interpolation_t = 0.0
+    start_transition([0.0, 0.0, 1.0, 0.0])
 
 def change_state(direction):
     """Change state by direction: -1 for previous, 1 for next, 0 for reset"""
-    global current_state_index, target_x, target_y, target_z, rotation_phase, interpolation_t
     
-    if len(states_list) == 0:
+    if len(steps) == 0:
         return
     
     # Calculate new index based on direction
@@ -115,21 +156,50 @@ def change_state(direction):
         else:
             return  # Already at first state
     elif direction == 1:  # Next
-        if current_state_index < len(states_list) - 1:
+        if current_state_index < len(steps) - 1:
             new_index = current_state_index + 1
         else:
             return  # Already at last state
     else:
         return
     
-    current_state_index = new_index
-    state = states_list[current_state_index]
+    seek(new_index)
+
+def seek(index):
+    """Jump straight to any recorded step, negative indices count from the end.
+    A session step is replayed from its nearest checkpoint, a trace step is read from the file."""
+    global quantum_circuit, current_state_index
+    
+    if index < 0:
+        index += len(steps)
+    current_state_index = max(0, min(len(steps) - 1, index))
+    state = steps[current_state_index]
+    if is_replaying:
+        # Show the recorded amplitudes of the step being viewed
+        quantum_circuit = Qubit(*steps.amplitudes(current_state_index))
+    start_transition(state)
+
+def start_transition(state):
+    """Animate from the displayed vector to an [x, y, z, phase] state.
+    The whole path is computed here, on_draw only picks the sample for the elapsed time."""
+    global target_x, target_y, target_z, rotation_phase, interpolation_t, transition_start, trajectory
     with vector_lock:
         target_x = state[0]
         target_y = state[1]
         target_z = state[2]
         rotation_phase = state[3]
+        
+        # Rotation vector based on phase (blend between X and Y): more X at phase=0, more Y at phase=1
+        rotation_vector = (1.0 - rotation_phase, rotation_phase, 0.0)
+        trajectory = slerp_trajectory(
+            (vector_x, vector_y, vector_z),
+            (target_x, target_y, target_z),
+            transition_progress,
+            via_vector=rotation_vector
+        )
+        transition_start = time.perf_counter()
         interpolation_t = 0.0
+    animate()
 
 
 # Lock for thread-safe access to vector variables
@@ -137,16 +207,9 @@ vector_lock = threading.Lock()
 
 def menu_thread(states=[]):
     """Background thread for handling terminal menu"""
-    global target_x, target_y, target_z, interpolation_t, rotation_phase
-    
     time.sleep(1)
     for state in states:
-        with vector_lock:
-            target_x = state[0]
-            target_y = state[1]
-            target_z = state[2]
-            rotation_phase = state[3]
-            interpolation_t = 0.0
+        start_transition(state)
         
         # Wait until interpolation is done
         while True:
@@ -155,266 +218,121 @@ def menu_thread(states=[]):
                     break
             time.sleep(0.1)
 
-def draw_circle(radius, segments=32, axis='z'):
-    """Draw a circle around the specified axis"""
-    glBegin(GL_LINE_LOOP)
-    for i in range(segments):
-        theta = 2.0 * math.pi * i / segments
-        x = radius * math.cos(theta)
-        y = radius * math.sin(theta)
-        
-        if axis == 'z':  # Circle in XY plane
-            glVertex3f(x, 0.0, y)
-        elif axis == 'y':  # Circle in XZ plane
-            glVertex3f(x, y, 0.0)
-        elif axis == 'x':  # Circle in YZ plane
-            glVertex3f(0.0, x, y)
-    glEnd()
-
 def draw_bloch_sphere(radius=1.0):
-    """Draw a Bloch sphere with meridians and equator"""
-    glLineWidth(1.5)
-    
-    # Draw equator
-    glColor3f(0.5, 0.5, 0.5)
-    draw_circle(radius, segments=64, axis='z')
-    
-    # Draw prime meridian
-    glColor3f(0.4, 0.4, 0.4)
-    draw_circle(radius, segments=64, axis='y')
-    
-    # Draw another meridian
-    glColor3f(0.4, 0.4, 0.4)
-    draw_circle(radius, segments=64, axis='x')
-    
-    
-    # Draw axes through sphere
-    glLineWidth(2.5)
-    glBegin(GL_LINES)
-    # X axis
-    glColor3f(0.8, 0.2, 0.2)
-    glVertex3f(-radius * 1.2, 0.0, 0.0)
-    glVertex3f(radius * 1.2, 0.0, 0.0)
-    
-    # Y axis
-    glColor3f(0.2, 0.2, 0.8)
-    glVertex3f(0.0, 0.0, -radius * 1.2)
-    glVertex3f(0.0, 0.0, radius * 1.2)
-    
-    # Z axis
-    glColor3f(0.2, 0.8, 0.2)
-    glVertex3f(0.0, -radius * 1.2, 0.0)
-    glVertex3f(0.0, radius * 1.2, 0.0)
-    glEnd()
+    """Draw a Bloch sphere with meridians, equator and axes from the prebuilt batch"""
+    sphere_geometry.draw(radius, segments=64)
 
 
 def draw_state_vector(vector_x, vector_y, vector_z):
     """Draw the quantum state vector with arrowhead, extending beyond the Bloch sphere"""
+    state_arrow.update([(vector_x, vector_y, vector_z)])
+    state_arrow.draw()
 
-    vec_length = math.sqrt(vector_x**2 + vector_y**2 + vector_z**2)
-    if vec_length > 1e-6:
-        # Normalize
-        norm_x = vector_x / vec_length
-        norm_y = vector_y / vec_length
-        norm_z = vector_z / vec_length
-        
-        # Extend by 15% beyond unit sphere to see the arrow
-        extended_x = norm_x * 1.15
-        extended_y = norm_y * 1.15
-        extended_z = norm_z * 1.15
+
+def show_ensemble(vectors, colors=None):
+    """Draw many Bloch vectors at once next to the state vector, e.g. QubitArray.coords or BatchResult.coords.
+    Passing the same number of vectors again only re-uploads the ones that moved."""
+    if colors is None and len(vectors) == len(ensemble_arrows):
+        ensemble_arrows.update(vectors)
     else:
-        extended_x, extended_y, extended_z = vector_x, vector_y, vector_z
-    
-    # Draw state vector
-    glLineWidth(4.0)
-    glBegin(GL_LINES)
-    glColor3f(1.0, 0.8, 0.0)
-    glVertex3f(0.0, 0.0, 0.0)
-    glVertex3f(extended_x, extended_z, extended_y)
-
-    # draw arrow
-    arrow_length = 0.1
-    dir_x = extended_x
-    dir_y = extended_z
-    dir_z = extended_y
-    vec_length_ext = math.sqrt(dir_x**2 + dir_y**2 + dir_z**2)
-
-    if vec_length_ext > 1e-6:
-        dir_x /= vec_length_ext
-        dir_y /= vec_length_ext
-        dir_z /= vec_length_ext
-
-        base_x = extended_x - dir_x * arrow_length
-        base_y = extended_z - dir_y * arrow_length
-        base_z = extended_y - dir_z * arrow_length
-
-        # Create two perpendicular vectors for the arrowhead wings
-        up_x, up_y, up_z = 0.0, 1.0, 0.0
-        if abs(dir_x) < 1e-6 and abs(dir_z) < 1e-6:
-            up_x, up_y, up_z = 1.0, 0.0, 0.0  # Change up vector if pointing along Y
-
-        # Cross product to get a perpendicular vector
-        perp_x = dir_y * up_z - dir_z * up_y
-        perp_y = dir_z * up_x - dir_x * up_z
-        perp_z = dir_x * up_y - dir_y * up_x
-
-        # Normalize perpendicular vector
-        perp_length = math.sqrt(perp_x**2 + perp_y**2 + perp_z**2)
-        if perp_length > 1e-6:
-            perp_x /= perp_length
-            perp_y /= perp_length
-            perp_z /= perp_length
-
-            wing_span = arrow_length * 0.5
-
-            # Left wing
-            glVertex3f(extended_x, extended_z, extended_y)
-            glVertex3f(base_x + perp_x * wing_span, base_y + perp_y * wing_span, base_z + perp_z * wing_span)
-            # Right wing
-            glVertex3f(extended_x, extended_z, extended_y)
-            glVertex3f(base_x - perp_x * wing_span, base_y - perp_y * wing_span, base_z - perp_z * wing_span)
-
-    glEnd()
+        ensemble_arrows.set_vectors(vectors, colors)
+    invalidate()
+
+
+def show_density(histogram):
+    """Color the sphere with a heatmap.SphereHistogram. Call again after adding to the
+    same histogram, only the bins that changed are uploaded again."""
+    global density_overlay
+    if density_overlay is None or density_overlay.histogram is not histogram:
+        density_overlay = DensityOverlay(histogram)
+    else:
+        density_overlay.update()
+    invalidate()
 
 
 def project_3d_to_2d(x, y, z):
     """Project 3D world coordinates to 2D screen coordinates"""
-    # Get the current model, projection, and viewport matrices
-    modelview = (GLdouble * 16)()
-    projection = (GLdouble * 16)()
-    viewport = (GLint * 4)()
-    
-    glGetDoublev(GL_MODELVIEW_MATRIX, modelview)
-    glGetDoublev(GL_PROJECTION_MATRIX, projection)
-    glGetIntegerv(GL_VIEWPORT, viewport)
-    
-    # Project the 3D point
-    win_x = GLdouble()
-    win_y = GLdouble()
-    win_z = GLdouble()
-    
-    gluProject(x, y, z, modelview, projection, viewport, win_x, win_y, win_z)
-    
-    return int(win_x.value), int(win_y.value)
-
-
-def format_complex(c, precision=3):
-    """Format complex number for display in bra-ket notation"""
-    real = c.real
-    imag = c.imag
-    
-    # Handle very small numbers as zero
-    if abs(real) < 1e-10:
-        real = 0.0
-    if abs(imag) < 1e-10:
-        imag = 0.0
-    
-    # Format the output
-    if imag == 0:
-        return f"{real:.{precision}f}"
-    elif real == 0:
-        if imag == 1.0:
-            return "i"
-        elif imag == -1.0:
-            return "-i"
-        else:
-            return f"{imag:.{precision}f}i"
-    else:
-        if imag > 0:
-            if imag == 1.0:
-                return f"{real:.{precision}f}+i"
-            else:
-                return f"{real:.{precision}f}+{imag:.{precision}f}i"
-        else:
-            if imag == -1.0:
-                return f"{real:.{precision}f}-i"
-            else:
-                return f"{real:.{precision}f}{imag:.{precision}f}i"
+    # Uses the CPU-side camera matrices, so no glGet round trip to the driver
+    win_x, win_y = camera.project((x, y, z))[0]
+    return int(win_x), int(win_y)
 
 
-def draw_state_notation():
-    """Draw the current quantum state in bra-ket notation"""
-    # Get amplitudes from quantum circuit
-    amp_a = quantum_circuit.amp_a
-    amp_b = quantum_circuit.amp_b
-    
-    # Format the state
-    coeff_0 = format_complex(amp_a)
-    coeff_1 = format_complex(amp_b)
-    
-    # Build the state string
-    state_str = f"|ψ⟩ = {coeff_0}|0⟩"
-    
-    # Add the second term
-    if amp_b.real >= 0 and amp_b.imag >= 0:
-        if abs(amp_b) > 1e-10:
-            state_str += f" + {coeff_1}|1⟩"
-    else:
-        if abs(amp_b) > 1e-10:
-            state_str += f" + {coeff_1}|1⟩"
-    
-    # If measured, show the collapsed state
-    if is_measured:
-        if abs(amp_a - 1.0) < 1e-10:
-            state_str = "|ψ⟩ = |0⟩ (measured)"
-        else:
-            state_str = "|ψ⟩ = |1⟩ (measured)"
-    
+def load_matrix(matrix):
+    """Replace the current GL matrix with a 4x4 numpy matrix"""
+    glLoadMatrixd((GLdouble * 16)(*camera.gl_matrix(matrix)))
+
+
+# Text labels are created once and share one batch. Their text only changes
+# with the displayed state and their positions only with the camera.
+label_batch = pyglet.graphics.Batch()
+axis_labels = []  # X, Y, Z
+state_label = None
+_labels_created = False
+_state_label_key = None
+_axis_labels_key = None
+
+def create_labels():
+    global state_label, _labels_created
+    _labels_created = True
+    try:
+        # Create labels for axis markers
+        axis_labels.extend([
+            pyglet.text.Label('X', font_size=14, x=0, y=0, color=(255, 0, 0, 255), batch=label_batch),
+            pyglet.text.Label('Y', font_size=14, x=0, y=0, color=(0, 0, 255, 255), batch=label_batch),
+            pyglet.text.Label('Z', font_size=14, x=0, y=0, color=(0, 255, 0, 255), batch=label_batch),
+        ])
+    except Exception as e:
+        print(f"Error creating axis labels. Skipping for now.")
     try:
         # Create label for state display
         state_label = pyglet.text.Label(
-            state_str,
+            '',
             font_size=16,
             x=window.width // 2,
             y=window.height - 30,
             anchor_x='center',
             anchor_y='center',
             color=(255, 255, 255, 255),
-            bold=True
+            bold=True,
+            batch=label_batch
         )
     except Exception as e:
         print(f"Error creating state label: {e}")
-        return
-    
-    # Switch to 2D mode for text rendering
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    glOrtho(0, window.width, 0, window.height, -1, 1)
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    
-    # Disable depth test for text
-    glDisable(GL_DEPTH_TEST)
-    
-    # Draw the state label
-    state_label.draw()
-    
-    # Restore previous state
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
-    glEnable(GL_DEPTH_TEST)
-
 
-def draw_axis_labels():
-    """Draw the X, Y, Z axis labels in 2D screen space"""
 
-    try:
-        # Create labels for axis markers
-        x_label = pyglet.text.Label('X', font_size=14, x=0, y=0, color=(255, 0, 0, 255))
-        y_label = pyglet.text.Label('Y', font_size=14, x=0, y=0, color=(0, 0, 255, 255))
-        z_label = pyglet.text.Label('Z', font_size=14, x=0, y=0, color=(0, 255, 0, 255))
-    except Exception as e:
-        print(f"Error creating axis labels. Skipping for now.")
+def update_state_notation():
+    """Refresh the bra-ket label, only when the displayed state changes"""
+    global _state_label_key
+    
+    key = (quantum_circuit.amp_a, quantum_circuit.amp_b, is_measured)
+    if state_label is None or key == _state_label_key:
         return
-    # Project 3D axis endpoints to 2D screen coordinates for labels
-    x_pos = project_3d_to_2d(1.4, 0.0, 0.0)
-    y_pos = project_3d_to_2d(0.0, 0.0, 1.4)
-    z_pos = project_3d_to_2d(0.0, 1.4, 0.0)
+    _state_label_key = key
+    state_label.text = state_notation(*key)
+
+
+def update_axis_labels():
+    """Move the X, Y, Z labels to their projected axis ends, only when the camera moves"""
+    global _axis_labels_key
     
+    if not axis_labels or camera.version == _axis_labels_key:
+        return
+    _axis_labels_key = camera.version
+    
+    # Project all 3D axis endpoints to 2D screen coordinates in one go
+    positions = camera.project([
+        (1.4, 0.0, 0.0),
+        (0.0, 0.0, 1.4),
+        (0.0, 1.4, 0.0),
+    ]).astype(int).tolist()
+    for label, (x, y) in zip(axis_labels, positions):
+        label.begin_update()
+        label.x, label.y = x, y
+        label.end_update()
+
+
+def draw_labels():
+    """Draw every text label in 2D screen space with one batch draw"""
     # Switch to 2D mode for text rendering
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
@@ -426,16 +344,8 @@ def draw_axis_labels():
     
     # Disable depth test for text
     glDisable(GL_DEPTH_TEST)
-
-    # Draw the axis labels
-    x_label.x, x_label.y = x_pos
-    x_label.draw()
-    
-    y_label.x, y_label.y = y_pos
-    y_label.draw()
     
-    z_label.x, z_label.y = z_pos
-    z_label.draw()
+    label_batch.draw()
     
     # Re-enable depth test and restore matrices
     glEnable(GL_DEPTH_TEST)
@@ -446,61 +356,50 @@ def draw_axis_labels():
 
 def add_gate(gate_name):
     """Add a gate operation to the quantum circuit"""
-    global current_state_index, target_x, target_y, target_z, rotation_phase, interpolation_t
     
-    if is_measured:
-        return  # Cannot add gates after measurement
+    if is_measured or is_replaying:
+        return  # Cannot add gates after measurement or to a recorded trace
     
-    states_list.append(apply_gate(gate_name))
+    apply_gate(gate_name)
+    steps.record(gate_name)
     
     # Move to the newly added state
-    current_state_index = len(states_list) - 1
-    state = states_list[current_state_index]
-    with vector_lock:
-        target_x = state[0]
-        target_y = state[1]
-        target_z = state[2]
-        rotation_phase = state[3]
-        interpolation_t = 0.0
+    seek(-1)
 
 
 def measure_circuit():
     """Measure the quantum circuit and collapse to definite state"""
-    global is_measured, current_state_index, target_x, target_y, target_z, rotation_phase, interpolation_t
+    global is_measured
     
-    if is_measured:
-        return  # Already measured
+    if is_measured or is_replaying:
+        return  # Already measured, or a recorded trace
     
     quantum_circuit.measure()
     is_measured = True
+    update_gate_buttons()
     
     # Add the collapsed state
-    x, y, z = quantum_circuit.coords
-    phase = quantum_circuit.phi / (2 * np.pi)
-    states_list.append([x, y, z, phase])
+    steps.record_measurement(0 if abs(quantum_circuit.amp_a) > 0.5 else 1)
     
     # Move to the measured state
-    current_state_index = len(states_list) - 1
-    state = states_list[current_state_index]
-    with vector_lock:
-        target_x = state[0]
-        target_y = state[1]
-        target_z = state[2]
-        rotation_phase = state[3]
-        interpolation_t = 0.0
+    seek(-1)
 
 
 def init_buttons():
-    prev_button = Button(20, 20, 40, 40, "<", lambda: change_state(-1))
-    next_button = Button(70, 20, 40, 40, ">", lambda: change_state(1))
-    reset_button = Button(120, 20, 100, 40, "Reset", lambda: reset_circuit())
-    h_gate_button = Button(240, 20, 60, 40, "H", lambda: add_gate('h'))
-    x_gate_button = Button(310, 20, 60, 40, "X", lambda: add_gate('x'))
-    z_gate_button = Button(380, 20, 60, 40, "Z", lambda: add_gate('z'))
-    s_gate_button = Button(450, 20, 60, 40, "S", lambda: add_gate('s'))
-    t_gate_button = Button(520, 20, 60, 40, "T", lambda: add_gate('t'))
-    measure_button = Button(590, 20, 80, 40, "Measure", lambda: measure_circuit())
-    buttons.extend([prev_button, next_button, reset_button, h_gate_button, x_gate_button, z_gate_button, s_gate_button, t_gate_button, measure_button])
+    toolbar.button(20, 20, 40, 40, "<", lambda: change_state(-1))
+    toolbar.button(70, 20, 40, 40, ">", lambda: change_state(1))
+    toolbar.button(120, 20, 100, 40, "Reset", lambda: reset_circuit())
+    for i, gate_name in enumerate('hxzst'):
+        toolbar.button(240 + 70 * i, 20, 60, 40, gate_name.upper(), lambda gate_name=gate_name: add_gate(gate_name))
+        gate_buttons.append(len(toolbar) - 1)
+    toolbar.button(590, 20, 80, 40, "Measure", lambda: measure_circuit())
+
+
+def update_gate_buttons():
+    """Hide the gate buttons once measured, show them again after a reset"""
+    for index in gate_buttons:
+        toolbar.set_visible(index, not is_measured)
+    invalidate()
 
 
 @window.event
@@ -509,59 +408,65 @@ def on_resize(width, height):
     glViewport(0, 0, width, height)
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    # Protect against height == 0
-    aspect = width / float(height or 1)
-    gluPerspective(45.0, aspect, 0.1, 100.0)
+    # Same perspective as gluPerspective(45, aspect, 0.1, 100), guarded against height == 0
+    camera.update(rot_x, rot_y, distance, pan_x, pan_y, width, height)
+    load_matrix(camera.projection)
     glMatrixMode(GL_MODELVIEW)  # Switch back to modelview
     glLoadIdentity()
+    invalidate()
     return pyglet.event.EVENT_HANDLED
 
 
+@window.event
+def on_expose():
+    invalidate()  # the window contents were damaged, e.g. uncovered
+
+
 @window.event
 def on_draw():
-    global rot_x, rot_y, distance, pan_x, pan_y, vector_x, vector_y, vector_z, interpolation_t
+    global vector_x, vector_y, vector_z, interpolation_t
+    window.invalid = False  # set again by anything that needs another frame
+    profiler.start()
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
 
-    # Apply camera transforms:
-    glTranslatef(pan_x, pan_y, -distance)
-    glRotatef(rot_x, 1.0, 0.0, 0.0)
-    glRotatef(rot_y, 0.0, 1.0, 0.0)
-    
-    # Store the starting position for SLERP
-    start_x, start_y, start_z = vector_x, vector_y, vector_z
+    # Apply camera transforms (pan, then rotate around X and Y), rebuilt only when the view moved
+    if camera.update(rot_x, rot_y, distance, pan_x, pan_y, window.width, window.height):
+        glMatrixMode(GL_PROJECTION)
+        load_matrix(camera.projection)
+        glMatrixMode(GL_MODELVIEW)
+    load_matrix(camera.modelview)
+    profiler.lap('camera')
     
-    # Update interpolation parameter
+    # Pick the precomputed trajectory sample for the elapsed time
     if interpolation_t < 1.0:
-        interpolation_t = min(1.0, interpolation_t + interpolation_speed)
-        
-        # Compute rotation vector based on phase (blend between X and Y)
-        phase_x = 1.0 - rotation_phase  # More X at phase=0
-        phase_y = rotation_phase         # More Y at phase=1
-        rotation_vector = (phase_x, phase_y, 0.0)
-        
-        # Use SLERP with the computed rotation vector
-        vector_x, vector_y, vector_z = slerp_via_axis(
-            start_x, start_y, start_z,
-            target_x, target_y, target_z,
-            interpolation_t,
-            via_vector=rotation_vector
-        )
+        interpolation_t = min(1.0, (time.perf_counter() - transition_start) / transition_duration)
+        vector_x, vector_y, vector_z = trajectory[int(round(interpolation_t * (len(trajectory) - 1)))].tolist()
+    profiler.lap('trajectory')
 
     draw_bloch_sphere(radius=1.0)
-    
+    profiler.lap('sphere')
+    
+    if density_overlay is not None:
+        density_overlay.draw()
+        profiler.lap('density')
+    if len(ensemble_arrows):
+        ensemble_arrows.draw()
+        profiler.lap('ensemble')
     draw_state_vector(vector_x, vector_y, vector_z)
+    profiler.lap('state_vector')
     
-    draw_axis_labels()
-    
-    draw_state_notation()
+    if not _labels_created:
+        create_labels()
+    update_axis_labels()
+    update_state_notation()
+    profiler.lap('label_update')
+    draw_labels()
+    profiler.lap('labels')
 
-    for i, button in enumerate(buttons):
-        # Hide gate buttons (indices 3, 4, 5) when measured
-        if is_measured and i in range(3, len(buttons) - 1):
-            continue
-        button.draw()
+    toolbar.draw(window.width, window.height)
+    profiler.lap('toolbar')
+    profiler.end('frame')
     
 
 @window.event
@@ -572,17 +477,14 @@ def on_mouse_press(x, y, button, modifiers):
     
     # Check if any button was clicked
     if button == mouse.LEFT:
-        for btn in buttons:
-            if btn.contains(x, y):
-                btn.action()
-                return
+        toolbar.click(x, y)
 
 
 @window.event
 def on_mouse_motion(x, y, dx, dy):
     """Handle mouse motion for button hover effects"""
-    for btn in buttons:
-        btn.hovered = btn.contains(x, y)
+    if toolbar.hover(x, y):
+        invalidate()
 
 
 @window.event
@@ -608,6 +510,7 @@ def on_mouse_drag(x, y, dx, dy, buttons, modifiers):
         pan_x += dx * pan_sens
         pan_y -= dy * pan_sens  # invert Y
 
+    invalidate()
     _last_mouse_x = x
     _last_mouse_y = y
 
@@ -622,6 +525,7 @@ def on_mouse_scroll(x, y, scroll_x, scroll_y):
     distance -= scroll_y * zoom_sens
     # Clamp distance to reasonable bounds
     distance = max(0.5, min(50.0, distance))
+    invalidate()
 
 
 @window.event
@@ -633,40 +537,104 @@ def on_key_press(symbol, modifiers):
         change_state(-1)
     elif symbol == key.RIGHT:
         change_state(1)
+    elif symbol == key.P:
+        toggle_profiling()
     # elif symbol == key.ESCAPE:
     #     window.close()
 
     
+def invalidate():
+    """Redraw once on the next event loop pass, on_draw clears the flag again"""
+    window.invalid = True
+
+
+def animate():
+    """Redraw at 30 Hz until the running transition finishes"""
+    global _ticking
+    window.invalid = True
+    if not _ticking:
+        _ticking = True
+        pyglet.clock.schedule_interval(update, 1/30.0)
+
+
 def update(dt):
-    pass  # Triggers continuous redraw for smooth interpolation
+    """Ticker that drives transitions, every scheduled call makes pyglet redraw.
+    Unscheduled once the vector settles, so an idle window sleeps until the next event."""
+    global _ticking
+    if interpolation_t >= 1.0:
+        pyglet.clock.unschedule(update)
+        _ticking = False
+
+
+def toggle_profiling():
+    """Start or stop timing on_draw and the gate path, with a p50/p99 overlay while on"""
+    global profile_label
+    if profiler.toggle():
+        profiler.clear()
+        profile_label = pyglet.text.Label(
+            profiler.report(),
+            font_name='Courier New',
+            font_size=10,
+            x=10,
+            y=window.height - 60,
+            width=320,
+            multiline=True,
+            anchor_y='top',
+            color=(255, 255, 0, 255),
+            batch=label_batch
+        )
+        # The overlay text is laid out twice a second, not every frame
+        pyglet.clock.schedule_interval(update_profile_label, 0.5)
+    else:
+        pyglet.clock.unschedule(update_profile_label)
+        profile_label.delete()
+        profile_label = None
+    invalidate()
 
 
-def visualize():
+def update_profile_label(dt):
+    """Refresh the overlay, running this also makes pyglet redraw so idle frames get timed"""
+    if profile_label is not None:
+        profile_label.text = profiler.report()
+
+
+def visualize(trace_path=None, ensemble=None, density=None):
     """Visualize a quantum circuit. Circuit is a list of gate operations.
     Each gate is a tuple: ('gate_name',) or ('gate_name', angle) for parametric gates.
     Example: [('H',), ('RX', np.pi/4), ('RY', np.pi/2)]
+    trace_path plays back a file recorded with tracefile.write_trace/TraceWriter.
+    ensemble is an optional (N, 3) array of Bloch vectors drawn alongside, see show_ensemble.
+    density is an optional heatmap.SphereHistogram drawn on the sphere, see show_density.
     """
-    global quantum_circuit, states_list, current_state_index, target_x, target_y, target_z, rotation_phase, interpolation_t
+    global quantum_circuit, steps, current_state_index, is_replaying
+    
+    if trace_path is not None:
+        steps = open_trace(trace_path)  # memory-mapped, only viewed pages are read
+        is_replaying = True
+        quantum_circuit = Qubit(*steps.amplitudes(0))
     
     # Initialize to first state if available
-    if len(states_list) > 0:
+    if len(steps) > 0:
         current_state_index = 0
-        state = states_list[0]
-        target_x = state[0]
-        target_y = state[1]
-        target_z = state[2]
-        rotation_phase = state[3]
-        interpolation_t = 0.0
+        start_transition(steps[0])  # runs the first transition, then idles
+
+    if ensemble is not None:
+        show_ensemble(ensemble)
+    if density is not None:
+        show_density(density)
 
     init_buttons()
+    if os.environ.get('BLOCH_PROFILE'):
+        toggle_profiling()
     
     # thread = threading.Thread(target=menu_thread, args=(states,), daemon=True)
     # thread.start()
 
-    pyglet.clock.schedule_interval(update, 1/30.0)
-
     pyglet.app.run()
 
+    if os.environ.get('BLOCH_PROFILE_CSV'):
+        profiler.write_csv(os.environ['BLOCH_PROFILE_CSV'])
+
 if __name__ == "__main__":
     # GL setup
     glEnable(GL_DEPTH_TEST)
@@ -675,5 +643,6 @@ if __name__ == "__main__":
     # Example quantum circuit to visualize
     # Each gate is a tuple: ('gate_name',) or ('gate_name', angle)
     
-    visualize()
+    # python main.py [trace file] plays back a recorded trace
+    visualize(sys.argv[1] if len(sys.argv) > 1 else None)
 
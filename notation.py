@@ -0,0 +1,54 @@
+def format_complex(c, precision=3):
+    """Format complex number for display in bra-ket notation"""
+    real = c.real
+    imag = c.imag
+    
+    # Handle very small numbers as zero
+    if abs(real) < 1e-10:
+        real = 0.0
+    if abs(imag) < 1e-10:
+        imag = 0.0
+    
+    # Format the output
+    if imag == 0:
+        return f"{real:.{precision}f}"
+    elif real == 0:
+        if imag == 1.0:
+            return "i"
+        elif imag == -1.0:
+            return "-i"
+        else:
+            return f"{imag:.{precision}f}i"
+    else:
+        if imag > 0:
+            if imag == 1.0:
+                return f"{real:.{precision}f}+i"
+            else:
+                return f"{real:.{precision}f}+{imag:.{precision}f}i"
+        else:
+            if imag == -1.0:
+                return f"{real:.{precision}f}-i"
+            else:
+                return f"{real:.{precision}f}{imag:.{precision}f}i"
+
+
+def state_notation(amp_a, amp_b, measured):
+    """Bra-ket string for a state, e.g. |ψ⟩ = 0.707|0⟩ + 0.707|1⟩"""
+    # Format the state
+    coeff_0 = format_complex(amp_a)
+    coeff_1 = format_complex(amp_b)
+    
+    # Build the state string
+    state_str = f"|ψ⟩ = {coeff_0}|0⟩"
+    
+    # Add the second term
+    if abs(amp_b) > 1e-10:
+        state_str += f" + {coeff_1}|1⟩"
+    
+    # If measured, show the collapsed state
+    if measured:
+        if abs(amp_a - 1.0) < 1e-10:
+            state_str = "|ψ⟩ = |0⟩ (measured)"
+        else:
+            state_str = "|ψ⟩ = |1⟩ (measured)"
+    return state_str
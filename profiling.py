@@ -0,0 +1,160 @@
+import csv
+import functools
+import numpy as np
+from time import perf_counter_ns
+
+# Samples kept per stage, older ones are overwritten
+RING_SIZE = 512
+
+
+class RingBuffer:
+    """Fixed-size int64 buffer of the most recent samples, allocated once"""
+
+    def __init__(self, capacity=RING_SIZE):
+        self.data = np.zeros(capacity, dtype=np.int64)
+        self.index = 0  # next slot to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value):
+        self.data[self.index] = value
+        self.index = (self.index + 1) % len(self.data)
+        if self.count < len(self.data):
+            self.count += 1
+
+    def values(self):
+        """Samples from the oldest to the newest"""
+        if self.count < len(self.data):
+            return self.data[:self.count]
+        return np.roll(self.data, -self.index)
+
+    def percentiles(self, q=(50, 99)):
+        if self.count == 0:
+            return [0.0] * len(q)
+        return np.percentile(self.data[:self.count], q).tolist()
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+
+class Profiler:
+    '''
+    Opt-in timing of frame stages and wrapped functions, in nanoseconds.
+
+    A frame is timed with start() followed by lap(stage) after every stage,
+    each lap recording the time since the previous one. While disabled, lap()
+    returns straight away and wrapped functions are restored to the originals,
+    so the only cost left is one attribute check per lap.
+    '''
+
+    def __init__(self, capacity=RING_SIZE):
+        self.capacity = capacity
+        self.enabled = False
+        self.stages = {}  # stage name -> RingBuffer, in first-seen order
+        self._last = 0
+        self._frame_start = 0
+        self._wrapped = []  # (owner, attribute, stage)
+        self._originals = {}
+
+    def buffer(self, stage):
+        if stage not in self.stages:
+            self.stages[stage] = RingBuffer(self.capacity)
+        return self.stages[stage]
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        for owner, attribute, stage in self._wrapped:
+            self._install(owner, attribute, stage)
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for (owner, attribute), original in self._originals.items():
+            setattr(owner, attribute, original)
+        self._originals.clear()
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def start(self):
+        """Begin timing a frame"""
+        if self.enabled:
+            self._frame_start = self._last = perf_counter_ns()
+
+    def lap(self, stage):
+        """Record the time since start() or the previous lap under `stage`"""
+        if self.enabled:
+            now = perf_counter_ns()
+            self.buffer(stage).add(now - self._last)
+            self._last = now
+
+    def end(self, stage='frame'):
+        """Record the whole frame since start() under `stage`"""
+        if self.enabled:
+            now = perf_counter_ns()
+            self.buffer(stage).add(now - self._frame_start)
+            self._last = now
+
+    def wrap(self, owner, attribute, stage=None):
+        """Time every call of owner.attribute (a module function or a class method) while enabled
+        Only the original is installed while disabled, so calls cost nothing extra."""
+        stage = stage or attribute
+        self._wrapped.append((owner, attribute, stage))
+        if self.enabled:
+            self._install(owner, attribute, stage)
+
+    def _install(self, owner, attribute, stage):
+        original = getattr(owner, attribute)
+        if isinstance(owner, type):
+            original = owner.__dict__[attribute]  # the plain function, not a bound method
+        buffer = self.buffer(stage)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                buffer.add(perf_counter_ns() - start)
+
+        self._originals[(owner, attribute)] = original
+        setattr(owner, attribute, timed)
+
+    def summary(self):
+        """[(stage, samples, p50 ns, p99 ns)] for every stage with samples"""
+        rows = []
+        for stage, buffer in self.stages.items():
+            if len(buffer):
+                p50, p99 = buffer.percentiles()
+                rows.append((stage, len(buffer), p50, p99))
+        return rows
+
+    def report(self):
+        """Text table of p50/p99 per stage in microseconds, for the on-screen overlay"""
+        lines = [f"{'stage':16s} {'p50 us':>9s} {'p99 us':>9s}"]
+        for stage, _, p50, p99 in self.summary():
+            lines.append(f"{stage:16s} {p50 / 1e3:9.1f} {p99 / 1e3:9.1f}")
+        return "\n".join(lines)
+
+    def write_csv(self, path):
+        """Every kept sample as stage,sample,ns rows, oldest sample first"""
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['stage', 'sample', 'ns'])
+            for stage, buffer in self.stages.items():
+                for index, value in enumerate(buffer.values().tolist()):
+                    writer.writerow([stage, index, value])
+
+    def clear(self):
+        for buffer in self.stages.values():
+            buffer.clear()
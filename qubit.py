@@ -1,7 +1,15 @@
 import numpy as np
-from cmath import phase
+import cmath
+import math
 import random
 
+import gates
+import sampling
+
+# Python and NumPy scalars, which the conversions handle with math/cmath
+# instead of paying for array wrapping on every gate
+_SCALAR_TYPES = (int, float, complex, np.number)
+
 class Qubit:
     '''
     '''
@@ -12,129 +20,122 @@ class Qubit:
         squared_sum = abs(amp_a)**2 + abs(amp_b)**2
         assert np.isclose(squared_sum,1), f"Qubit's squared amplitudes must add up to 1, not {squared_sum}"
         #amplitudes 
-        self.amp_a = amp_a + 0j #cos(theta/2)
-        self.amp_b = amp_b + 0j#e^(i*phi) * sin(theta/2)
+        self._amp_a = amp_a + 0j #cos(theta/2)
+        self._amp_b = amp_b + 0j#e^(i*phi) * sin(theta/2)
         
         #phase angles in rads, spherical cooridates 
         # 0 <= theta <= pi, angle between vertical axis z and toward horizontal xy plane
         # 0 <= phi <= 2pi, angle from x to y axis
-        self.theta,self.phi = Qubit.amp_to_spherical(amp_a,amp_b)
-        
-        #cartesian coordinates 
-        self.coords =  Qubit.spherical_to_cartesian(self.theta,self.phi)# x, y, z 
+        #cartesian coordinates x, y, z
+        #both are derived from the amplitudes lazily, see theta/phi/coords below
+        self.__update()
         
         self.is_collapsed = False
         
         
+    #AMPLITUDES AND DERIVED COORDINATES
+    @property
+    def amp_a(self):
+        return self._amp_a
+    
+    @amp_a.setter
+    def amp_a(self, value):
+        self._amp_a = value
+        self.__update()
+    
+    @property
+    def amp_b(self):
+        return self._amp_b
+    
+    @amp_b.setter
+    def amp_b(self, value):
+        self._amp_b = value
+        self.__update()
+    
+    # theta, phi and coords can still be assigned like plain attributes, the
+    # value is kept until the amplitudes next change
+    @property
+    def theta(self):
+        return self.spherical_angles()[0]
+    
+    @theta.setter
+    def theta(self, value):
+        self._angles = (value, self.phi)
+    
+    @property
+    def phi(self):
+        return self.spherical_angles()[1]
+    
+    @phi.setter
+    def phi(self, value):
+        self._angles = (self.theta, value)
+    
+    @property
+    def coords(self):
+        if self._coords is None:
+            self._coords = Qubit.spherical_to_cartesian(*self.spherical_angles())
+        return self._coords
+    
+    @coords.setter
+    def coords(self, value):
+        self._coords = value
+    
     #GATE OPERATIONS    
     def __update(self):
-        #bloch angle rotation method
-        angles = Qubit.amp_to_spherical(self.amp_a,self.amp_b)
-        self.theta = angles[0]
-        self.phi = angles[1]
-        
-        #update coords
-        self.coords = Qubit.amp_to_cartesian(self.amp_a,self.amp_b)
+        #amplitudes changed, drop cached angles, coords and distribution until they are next read
+        self._angles = None
+        self._coords = None
+        self._distribution = None
         
-        
-    def rx(self,angle,clockwise = True): #rotate x by angle
-        
-        #bloch angle rotation method
-        #self.theta = np.pi - self.theta
-        #self.phi = -self.phi
-        
-        #matrix multiplication method
-        #matrix = np.array([[np.cos(angle/2)+0j,-1j*np.sin(angle/2)],[-1j*np.sin(angle/2),np.cos(angle/2)+0j]])
-        #vector = self.state_vector()
-        #result = matrix @ vector
-        #self.amp_a = result[0]
-        #self.amp_b = result[1] 
+    def apply(self, matrix): #apply any 2x2 unitary, e.g. one from gates.py, without computing coords
+        (m00, m01), (m10, m11) = matrix.tolist()
+        amp_a, amp_b = self._amp_a, self._amp_b
+        self._amp_a = m00*amp_a + m01*amp_b
+        self._amp_b = m10*amp_a + m11*amp_b
         
         self.__update()
-        return self.coords 
+        return self
+    
+    #the named gates return the new coords, like they always have
+    def rx(self,angle,clockwise = True): #rotate x by angle
+        self.apply(gates.rx(angle))
+        return self.coords
     
     def ry(self,angle,clockwise = True): #rotate Y by angle
-        # theta' = pi - theta
-        # phi' = pi -phi
-        #bloch angle rotation method
-        #self.theta = np.pi - self.theta
-        #self.phi = np.pi - self.phi
-        
-        #matrix multiplication method
-        matrix = np.array([[np.cos(angle/2)+0j,-np.sin(angle/2)+0j],[np.sin(angle/2)+0j,np.cos(angle/2)+0j]])
-        vector = self.state_vector()
-        result = matrix @ vector
-        self.amp_a = result[0]
-        self.amp_b = result[1] 
-        
-        self.__update()
+        self.apply(gates.ry(angle))
         return self.coords
-       
     
     def rz(self,angle,clockwise = True):  #rotate Z by angle
-       
-        #bloch angle rotation method
-        self.phi = angle + self.phi
-        
-        #matrix multiplication method
-        matrix = np.array([[1,0],[0,-1]])
-        vector = self.state_vector()
-        result = matrix @ vector
-        self.amp_a = result[0]
-        self.amp_b = result[1] 
-        
-        self.__update()
-        return self.coords 
+        self.apply(gates.rz(angle))
+        return self.coords
     
     def x(self):  #rotate 180 around x-axis, theta' = pi - theta, phi' = -phi
+        self.apply(gates.X)
+        return self.coords
         
-        #matrix multiplication method
-        matrix = np.array([[0,1],[1,0]])
-        vector = self.state_vector()
-        result = matrix @ vector
-        self.amp_a = result[0]
-        self.amp_b = result[1] 
-        
-        self.__update()
-        return self.coords  
-
-        
-    def y(self):
-    #Y Gate - rotate 180 around y
-       pass    
+    def y(self): #Y Gate - rotate 180 around y
+        self.apply(gates.Y)
+        return self.coords
     
     def z(self): #Z Gate - rotate 180 around z, theta' = theta, phi' = pi + phi
-        return self.rz(np.pi, clockwise=False)
-    
+        self.apply(gates.Z)
+        return self.coords
     
     def h(self):
-        #matrix multiplication method
-        matrix = 1/np.sqrt(2) * np.array([[1,1],[1,-1]])
-        vector = self.state_vector()
-        result = matrix @ vector
-        self.amp_a = result[0]
-        self.amp_b = result[1] 
-        
-        self.__update()
-        return self.coords 
+        self.apply(gates.H)
+        return self.coords
     
     def p(self, angle):
-        matrix = np.array([[1,0],[0,np.exp(1j*angle)]])
-        vector = self.state_vector()
-        
-        result = matrix @ vector
-        self.amp_a = result[0]
-        self.amp_b = result[1] 
-        
-        self.__update()
-        return self.coords 
-        
+        self.apply(gates.p(angle))
+        return self.coords
     
     def s(self):
-        return self.p(np.pi/2)
+        self.apply(gates.S)
+        return self.coords
     
     def t(self):
-        return self.p(np.pi/4)
+        self.apply(gates.T)
+        return self.coords
     
     def measure(self): #collapses qubit state to either |0> or |1> based on ampltiude
         
@@ -143,17 +144,29 @@ class Qubit:
         if(random.random()<=prob_0):
             self.amp_a = 1
             self.amp_b = 0
-            self.theta = 0
-            self.phi = 0
-            self.coords = (0,0,1)
+            self._angles = (0,0)
+            self._coords = (0,0,1)
         else:
             self.amp_a = 0
             self.amp_b = 1
-            self.theta = np.pi
-            self.phi = 0
-            self.coords = (0,0,-1)
+            self._angles = (np.pi,0)
+            self._coords = (0,0,-1)
         self.is_collapsed = True
     
+    def sample(self, shots, rng=None, counts=False): #measure many times without collapsing
+        """Draw `shots` measurement outcomes (0 or 1) from the current state
+        
+        rng can be a seed, SeedSequence or numpy Generator (see sampling.spawn_rngs
+        for parallel workers). Returns a uint8 outcome array, or with counts=True
+        the array [count_0, count_1].
+        """
+        return self.distribution().sample(shots, rng, counts)
+    
+    def distribution(self): #measurement distribution, cached until the amplitudes change
+        if self._distribution is None:
+            self._distribution = sampling.MeasurementDistribution.from_amplitudes((self._amp_a, self._amp_b))
+        return self._distribution
+    
     # PRINTING AND REPRESENTATIONS
     
     def __str__(self):
@@ -166,46 +179,77 @@ class Qubit:
         return self.amp_a * self.BASE_0 + self.amp_b * self.BASE_1 
      
     def spherical_angles(self):
-        return (self.theta,self.phi)
+        if self._angles is None:
+            self._angles = Qubit.amp_to_spherical(self._amp_a,self._amp_b)
+        return self._angles
+    
+    # CONVERSIONS
+    # All of these accept scalars or same-shaped (broadcastable) NumPy arrays,
+    # so whole batches or states histories convert in one call.
+    # Scalar inputs give scalar outputs and take a plain math/cmath fast path.
     
     def spherical_to_amp(theta,phi):
+        theta = np.asarray(theta)
+        phi = np.asarray(phi)
         amp_a = np.cos(theta/2) 
         amp_b = np.exp(1j*phi) *np.sin(theta/2) #e^(i*phi) * sin(theta/2)
-        return (amp_a,amp_b)
+        return (amp_a[()],amp_b[()])
     
     def spherical_to_cartesian(theta,phi):
+        if isinstance(theta, _SCALAR_TYPES) and isinstance(phi, _SCALAR_TYPES):
+            sin_theta = math.sin(theta)
+            return (sin_theta * math.cos(phi), sin_theta * math.sin(phi), math.cos(theta))
+        theta = np.asarray(theta)
+        phi = np.asarray(phi)
         x = np.sin(theta) * np.cos(phi)
         y = np.sin(theta) * np.sin(phi)
         z = np.cos(theta)
-        return (x,y,z)
-    
-    def amp_to_spherical(amp_a,amp_b): # phi not correct, has issues when theta is 0 and amp_a = 1
-        # Remove global phase by normalizing to make amp_a real and positive
-        if abs(amp_a) > 1e-10:
-            global_phase = phase(amp_a)
-            amp_a = amp_a * np.exp(-1j * global_phase)
-            amp_b = amp_b * np.exp(-1j * global_phase)
+        return (x[()],y[()],z[()])
+    
+    def amp_to_spherical(amp_a,amp_b): # returns (-theta, -phi), the sign convention used for coords
+        if isinstance(amp_a, _SCALAR_TYPES) and isinstance(amp_b, _SCALAR_TYPES):
+            mag_a = abs(amp_a)
+            if mag_a > 1e-10:
+                amp_b = amp_b * cmath.exp(-1j * cmath.phase(amp_a))
+            theta = 2 * math.acos(min(max(mag_a, -1.0), 1.0))
+            phi = cmath.phase(amp_b) if abs(math.sin(theta/2)) > 1e-10 else 0.0
+            return (-theta, -phi)
+        
+        amp_a = np.asarray(amp_a, dtype=np.complex128)
+        amp_b = np.asarray(amp_b, dtype=np.complex128)
+        mag_a = np.abs(amp_a)
+        
+        # Remove global phase by normalizing to make amp_a real and positive,
+        # except where amp_a is ~0 and has no meaningful phase
+        global_phase = np.where(mag_a > 1e-10, np.angle(amp_a), 0.0)
+        amp_b = amp_b * np.exp(-1j * global_phase)
         
         # Now calculate theta and phi
-        theta = (2 * np.arccos(np.clip(abs(amp_a), -1, 1))).real
+        theta = 2 * np.arccos(np.clip(mag_a, -1, 1))
         
-        # Calculate phi from amp_b
-        if abs(np.sin(theta/2)) > 1e-10:
-            phi = phase(amp_b)
-        else:
-            phi = 0.0
+        # Calculate phi from amp_b, phi is undefined at the poles so use 0 there
+        phi = np.where(np.abs(np.sin(theta/2)) > 1e-10, np.angle(amp_b), 0.0)
         
-        return(-theta, -phi) 
+        return(-theta[()], -phi[()]) 
     
     def amp_to_cartesian(amp_a,amp_b):
         spherical = Qubit.amp_to_spherical(amp_a, amp_b)
         cartesian = Qubit.spherical_to_cartesian(spherical[0],spherical[1])
         return cartesian
     
-    def cartesian_to_spherical(x,y,z):
-        pass
-    
-    def cartesian_to_amp(x,y,z):
-        pass
+    def cartesian_to_spherical(x,y,z): # inverse of spherical_to_cartesian, same (-theta, -phi) convention as amp_to_spherical
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        z = np.asarray(z, dtype=np.float64)
+        r = np.sqrt(x*x + y*y + z*z)
+        
+        # Zero length vectors are treated as |0>
+        cos_theta = np.divide(z, r, out=np.ones_like(r), where=r > 1e-10)
+        theta = np.arccos(np.clip(cos_theta, -1, 1))
+        phi = np.where(np.abs(np.sin(theta)) > 1e-10, np.arctan2(-y, -x), 0.0)
+        
+        return (-theta[()], phi[()])
     
-    
\ No newline at end of file
+    def cartesian_to_amp(x,y,z): # inverse of amp_to_cartesian, amp_a is real and non-negative
+        theta, phi = Qubit.cartesian_to_spherical(x, y, z)
+        return Qubit.spherical_to_amp(-theta, -phi)
@@ -0,0 +1,117 @@
+import numpy as np
+
+import gates
+from qubit import Qubit
+
+
+class QubitArray:
+    '''
+    Structure-of-arrays batch of independent single qubits.
+
+    Amplitudes live in two contiguous complex128 arrays so every gate is a
+    handful of whole-array NumPy operations instead of one Python call per qubit.
+    Gate methods mirror Qubit (h, x, z, s, t, p, ry, rz, measure) and return
+    self so calls can be chained.
+    '''
+
+    def __init__(self, amp_a, amp_b):
+        amp_a, amp_b = np.broadcast_arrays(np.asarray(amp_a, dtype=np.complex128),
+                                           np.asarray(amp_b, dtype=np.complex128))
+        squared_sum = np.abs(amp_a)**2 + np.abs(amp_b)**2
+        assert np.allclose(squared_sum, 1), "Qubit's squared amplitudes must add up to 1"
+        #amplitudes, one entry per qubit
+        self.amp_a = np.ascontiguousarray(amp_a, dtype=np.complex128).copy()
+        self.amp_b = np.ascontiguousarray(amp_b, dtype=np.complex128).copy()
+
+        self.is_collapsed = np.zeros(self.amp_a.shape, dtype=bool)
+
+    @classmethod
+    def full(cls, size, amp_a=1+0j, amp_b=0+0j):
+        """Create `size` qubits that all start in the same state (|0> by default)"""
+        return cls(np.full(size, amp_a, dtype=np.complex128),
+                   np.full(size, amp_b, dtype=np.complex128))
+
+    def __len__(self):
+        return self.amp_a.size
+
+    #GATE OPERATIONS
+    def __apply(self, matrix):
+        #[a', b'] = matrix @ [a, b] for every qubit at once
+        m00, m01 = matrix[0]
+        m10, m11 = matrix[1]
+        if m01 == 0 and m10 == 0:
+            # diagonal gates only touch amplitudes in place
+            if m00 != 1:
+                self.amp_a *= m00
+            if m11 != 1:
+                self.amp_b *= m11
+            return self
+        new_a = m00 * self.amp_a
+        new_a += m01 * self.amp_b
+        self.amp_b *= m11
+        self.amp_b += m10 * self.amp_a
+        self.amp_a = new_a
+        return self
+
+    def ry(self, angle):
+        return self.__apply(gates.ry(angle))
+
+    def rz(self, angle):
+        return self.__apply(gates.rz(angle))
+
+    def x(self):
+        self.amp_a, self.amp_b = self.amp_b, self.amp_a
+        return self
+
+    def z(self):
+        return self.__apply(gates.Z)
+
+    def h(self):
+        return self.__apply(gates.H)
+
+    def p(self, angle):
+        return self.__apply(gates.p(angle))
+
+    def s(self):
+        return self.__apply(gates.S)
+
+    def t(self):
+        return self.__apply(gates.T)
+
+    def measure(self, rng=None):
+        """Collapse every qubit to |0> or |1>, returns the outcomes as a uint8 array"""
+        assert not self.is_collapsed.any(), "This qubit array has already been measured"
+        rng = np.random.default_rng(rng)
+        prob_0 = np.abs(self.amp_a)**2
+        outcomes = (rng.random(self.amp_a.shape) > prob_0).astype(np.uint8)
+        self.amp_a = np.where(outcomes == 0, 1+0j, 0j)
+        self.amp_b = np.where(outcomes == 0, 0j, 1+0j)
+        self.is_collapsed[...] = True
+        return outcomes
+
+    # VECTORIZED VIEWS
+
+    def state_vectors(self):
+        """(..., 2) array of [amp_a, amp_b] per qubit"""
+        return np.stack((self.amp_a, self.amp_b), axis=-1)
+
+    def probabilities(self):
+        """(..., 2) array of measurement probabilities for |0> and |1>"""
+        return np.abs(self.state_vectors())**2
+
+    def spherical_angles(self):
+        """Bloch angles (theta, phi) per qubit, same convention as Qubit.amp_to_spherical"""
+        return Qubit.amp_to_spherical(self.amp_a, self.amp_b)
+
+    @property
+    def theta(self):
+        return self.spherical_angles()[0]
+
+    @property
+    def phi(self):
+        return self.spherical_angles()[1]
+
+    @property
+    def coords(self):
+        """(..., 3) array of Cartesian Bloch coordinates per qubit"""
+        return np.stack(Qubit.spherical_to_cartesian(*self.spherical_angles()), axis=-1)
@@ -0,0 +1,354 @@
+import os
+import struct
+import zlib
+from functools import lru_cache
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from camera import Camera
+from checkpoints import MEASURE_ID
+from circuit import step_amplitudes
+from notation import state_notation
+from qubit import Qubit
+from shapes import ARROW_COLOR, ARROW_WIDTH, AXIS_WIDTH, CIRCLE_WIDTH, arrow_vertices, sphere_axes, sphere_circles
+from tracefile import open_trace
+from vector_utils import slerp_via_axis_array
+
+try:
+    from PIL import Image  # only needed for GIF export
+except ImportError:
+    Image = None
+
+# Headless software renderer of the visualizer's scene. Draws into numpy
+# images with the same camera as main.py, without pyglet, a window or a GPU.
+
+CLEAR_COLOR = (0.1, 0.1, 0.1)
+
+# Chunks handed to each worker, like batch.run_batch
+CHUNKS_PER_WORKER = 4
+
+# Trace steps read from the memory map per render_frames call by export_trace
+TRACE_SLICE = 65536
+
+# 5x7 bitmap font, one 5-bit row per line, top row first and leftmost pixel as the high bit.
+# Covers the axis labels and state_notation text, anything else is drawn as a box.
+FONT = {
+    ' ': (0, 0, 0, 0, 0, 0, 0),
+    '0': (0x0E, 0x11, 0x13, 0x15, 0x19, 0x11, 0x0E),
+    '1': (0x04, 0x0C, 0x04, 0x04, 0x04, 0x04, 0x0E),
+    '2': (0x0E, 0x11, 0x01, 0x02, 0x04, 0x08, 0x1F),
+    '3': (0x1F, 0x02, 0x04, 0x02, 0x01, 0x11, 0x0E),
+    '4': (0x02, 0x06, 0x0A, 0x12, 0x1F, 0x02, 0x02),
+    '5': (0x1F, 0x10, 0x1E, 0x01, 0x01, 0x11, 0x0E),
+    '6': (0x06, 0x08, 0x10, 0x1E, 0x11, 0x11, 0x0E),
+    '7': (0x1F, 0x01, 0x02, 0x04, 0x08, 0x08, 0x08),
+    '8': (0x0E, 0x11, 0x11, 0x0E, 0x11, 0x11, 0x0E),
+    '9': (0x0E, 0x11, 0x11, 0x0F, 0x01, 0x02, 0x0C),
+    '.': (0, 0, 0, 0, 0, 0x0C, 0x0C),
+    '+': (0, 0x04, 0x04, 0x1F, 0x04, 0x04, 0),
+    '-': (0, 0, 0, 0x1F, 0, 0, 0),
+    '=': (0, 0, 0x1F, 0, 0x1F, 0, 0),
+    '|': (0x04, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04),
+    '⟩': (0x08, 0x04, 0x04, 0x02, 0x04, 0x04, 0x08),
+    '<': (0x01, 0x02, 0x04, 0x08, 0x04, 0x02, 0x01),
+    '>': (0x10, 0x08, 0x04, 0x02, 0x04, 0x08, 0x10),
+    '(': (0x02, 0x04, 0x08, 0x08, 0x08, 0x04, 0x02),
+    ')': (0x08, 0x04, 0x02, 0x02, 0x02, 0x04, 0x08),
+    'ψ': (0x15, 0x15, 0x15, 0x0E, 0x04, 0x04, 0x04),
+    'a': (0, 0, 0x0E, 0x01, 0x0F, 0x11, 0x0F),
+    'd': (0x01, 0x01, 0x0D, 0x13, 0x11, 0x11, 0x0F),
+    'e': (0, 0, 0x0E, 0x11, 0x1F, 0x10, 0x0E),
+    'i': (0x04, 0, 0x0C, 0x04, 0x04, 0x04, 0x0E),
+    'm': (0, 0, 0x1A, 0x15, 0x15, 0x11, 0x11),
+    'r': (0, 0, 0x16, 0x19, 0x10, 0x10, 0x10),
+    's': (0, 0, 0x0E, 0x10, 0x0E, 0x01, 0x1E),
+    'u': (0, 0, 0x11, 0x11, 0x11, 0x13, 0x0D),
+    'X': (0x11, 0x11, 0x0A, 0x04, 0x0A, 0x11, 0x11),
+    'Y': (0x11, 0x11, 0x0A, 0x04, 0x04, 0x04, 0x04),
+    'Z': (0x1F, 0x01, 0x02, 0x04, 0x08, 0x10, 0x1F),
+}
+UNKNOWN_GLYPH = (0x1F, 0x11, 0x11, 0x11, 0x11, 0x11, 0x1F)
+GLYPH_WIDTH, GLYPH_HEIGHT, GLYPH_ADVANCE = 5, 7, 6
+
+
+def _to_rgb(color):
+    return np.round(np.asarray(color, dtype=np.float64) * 255).astype(np.uint8)
+
+
+@lru_cache(maxsize=256)
+def text_mask(text, scale=2):
+    """Boolean (7*scale, len(text)*6*scale) bitmap of a line of text, cached since labels repeat"""
+    rows = np.array([FONT.get(char, UNKNOWN_GLYPH) for char in text], dtype=np.uint8).reshape(-1, GLYPH_HEIGHT)
+    bits = (rows[:, :, np.newaxis] >> np.arange(GLYPH_WIDTH - 1, -1, -1)) & 1  # (chars, 7, 5)
+    glyphs = np.zeros((len(text), GLYPH_HEIGHT, GLYPH_ADVANCE), dtype=bool)
+    glyphs[:, :, :GLYPH_WIDTH] = bits
+    mask = glyphs.transpose(1, 0, 2).reshape(GLYPH_HEIGHT, -1)
+    return np.repeat(np.repeat(mask, scale, axis=0), scale, axis=1)
+
+
+def draw_text(image, text, x, y, color=(1.0, 1.0, 1.0), scale=2, center=False):
+    """Stamp text with its baseline-left corner (or center) at window coordinates (x, y), y up"""
+    mask = text_mask(text, scale)
+    height, width = mask.shape
+    left = int(round(x - width / 2)) if center else int(round(x))
+    bottom = int(round(y - height / 2)) if center else int(round(y))
+    top = image.shape[0] - bottom - height  # image rows go down
+    # Clip the stamp to the image
+    r0, c0 = max(top, 0), max(left, 0)
+    r1, c1 = min(top + height, image.shape[0]), min(left + width, image.shape[1])
+    if r0 >= r1 or c0 >= c1:
+        return
+    region = image[r0:r1, c0:c1]
+    region[mask[r0 - top:r1 - top, c0 - left:c1 - left]] = _to_rgb(color)
+
+
+def draw_lines(image, points, colors, width=1.0):
+    """Rasterize (M, 2, 2) window-space segments (y up) with (M, 3) RGB colors, later segments on top
+
+    Every segment is sampled once per pixel along its major axis, then
+    thickened across it like aliased GL wide lines, all in one vectorized pass.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2, 2)
+    if len(points) == 0:
+        return
+    colors = np.broadcast_to(_to_rgb(colors), (len(points), 3))
+    height, image_width = image.shape[:2]
+
+    start, delta = points[:, 0], points[:, 1] - points[:, 0]
+    steps = np.ceil(np.abs(delta).max(axis=-1)).astype(np.int64) + 1
+    segment = np.repeat(np.arange(len(points)), steps)
+    first = np.cumsum(steps) - steps
+    t = (np.arange(len(segment)) - first[segment]) / np.maximum(steps[segment] - 1, 1)
+    samples = start[segment] + delta[segment] * t[:, np.newaxis]
+
+    # Spread perpendicular to the major axis
+    thickness = max(1, int(width + 0.5))  # GL rounds half widths up
+    offsets = np.arange(thickness) - (thickness - 1) // 2
+    x_major = (np.abs(delta[:, 0]) >= np.abs(delta[:, 1]))[segment]
+    xs = np.floor(samples[:, 0:1]) + np.where(x_major[:, np.newaxis], 0, offsets)
+    ys = np.floor(samples[:, 1:2]) + np.where(x_major[:, np.newaxis], offsets, 0)
+    cols = xs.astype(np.int64).ravel()
+    rows = (height - 1 - ys).astype(np.int64).ravel()
+    sample_colors = np.repeat(colors[segment], thickness, axis=0)
+
+    inside = (cols >= 0) & (cols < image_width) & (rows >= 0) & (rows < height)
+    # Fancy-index assignment keeps the last write per pixel, so later segments win
+    image[rows[inside], cols[inside]] = sample_colors[inside]
+
+
+class FrameRenderer:
+    """Renders Bloch sphere frames into (height, width, 3) uint8 arrays
+
+    Uses the same camera parameters, colors and line widths as main.py. The
+    sphere, axes and axis labels only depend on the camera, so they are drawn
+    once into a background and every frame adds the state arrow and label.
+    Lines are drawn in scene order (sphere, axes, arrow) without a depth buffer.
+    """
+
+    def __init__(self, width=800, height=800, rot_x=20.0, rot_y=-30.0, distance=7.0, pan_x=0.0, pan_y=0.0,
+                 radius=1.0, segments=64):
+        self.width = width
+        self.height = height
+        self.camera = Camera()
+        self.camera.update(rot_x, rot_y, distance, pan_x, pan_y, width, height)
+
+        self.background = np.empty((height, width, 3), dtype=np.uint8)
+        self.background[:] = _to_rgb(CLEAR_COLOR)
+        self._draw_scene_lines(self.background, *sphere_circles(radius, segments), CIRCLE_WIDTH)
+        self._draw_scene_lines(self.background, *sphere_axes(radius), AXIS_WIDTH)
+        for text, point, color in (('X', (1.4, 0.0, 0.0), (1.0, 0.0, 0.0)),
+                                   ('Y', (0.0, 0.0, 1.4), (0.0, 0.0, 1.0)),
+                                   ('Z', (0.0, 1.4, 0.0), (0.0, 1.0, 0.0))):
+            x, y = self.camera.project(point)[0]
+            draw_text(self.background, text, x, y, color)
+
+    def _draw_scene_lines(self, image, vertices, colors, width):
+        """Project GL_LINES style (2M, 3) vertices and draw them, dropping segments behind the camera"""
+        vertices = np.asarray(vertices).reshape(-1, 3)
+        colors = np.asarray(colors).reshape(-1, 2, 3)[:, 0]
+        visible = (self.camera.depth(vertices) > self.camera.near).reshape(-1, 2).all(axis=-1)
+        points = self.camera.project(vertices).reshape(-1, 2, 2)
+        draw_lines(image, points[visible], colors[visible], width)
+
+    def render(self, vector, amplitudes=None, measured=False):
+        """One frame with the state arrow at Bloch `vector` and, with amplitudes, the bra-ket label"""
+        image = self.background.copy()
+        arrow = arrow_vertices(vector).reshape(-1, 3)
+        self._draw_scene_lines(image, arrow, np.tile(ARROW_COLOR, (len(arrow), 1)), ARROW_WIDTH)
+        if amplitudes is not None:
+            text = state_notation(amplitudes[0], amplitudes[1], measured)
+            draw_text(image, text, self.width / 2, self.height - 30, center=True)
+        return image
+
+
+def write_png(path, image):
+    """Write an (H, W, 3) uint8 image as an 8-bit RGB PNG, using only zlib"""
+    height, width = image.shape[:2]
+    raw = np.zeros((height, 1 + 3 * width), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = np.ascontiguousarray(image, dtype=np.uint8).reshape(height, -1)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n')
+        file.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        file.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)))
+        file.write(chunk(b'IEND', b''))
+
+
+def require_pillow():
+    """Raise ImportError unless Pillow is installed, checked before rendering anything for a GIF"""
+    if Image is None:
+        raise ImportError("GIF export needs Pillow (pip install pillow)")
+
+
+def write_gif(path, frames, fps=30):
+    """Write a sequence of (H, W, 3) uint8 frames as a looping GIF, needs Pillow"""
+    require_pillow()
+    images = [Image.fromarray(frame) for frame in frames]
+    images[0].save(path, save_all=True, append_images=images[1:], duration=int(round(1000 / fps)), loop=0)
+
+
+def frame_states(coords, phases, frames_per_step=1):
+    """Per-frame Bloch vectors and the step each frame belongs to
+
+    Frame 0 shows step 0, then every transition between consecutive steps gets
+    frames_per_step frames ending on the new step, slerped through the same
+    phase-dependent axis as the visualizer.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    if frames_per_step <= 1 or len(coords) < 2:
+        return coords, np.arange(len(coords))
+    phases = np.asarray(phases, dtype=np.float64)[1:]
+    via = np.stack((1.0 - phases, phases, np.zeros_like(phases)), axis=-1)
+    t = np.arange(1, frames_per_step + 1) / frames_per_step
+    vectors = slerp_via_axis_array(coords[:-1], coords[1:], t, via).reshape(-1, 3)
+    steps = np.repeat(np.arange(1, len(coords)), frames_per_step)
+    return np.concatenate((coords[:1], vectors)), np.concatenate(([0], steps))
+
+
+def _render_chunk(view, vectors, amplitudes, measured, indices, out_dir):
+    """Worker side: render one chunk of frames, written to out_dir as PNGs or returned as arrays"""
+    renderer = FrameRenderer(**view)
+    frames = []
+    for vector, amps, is_measured, index in zip(vectors, amplitudes, measured, indices):
+        image = renderer.render(vector, amps, bool(is_measured))
+        if out_dir is None:
+            frames.append(image)
+        else:
+            write_png(os.path.join(out_dir, f"frame_{index:06d}.png"), image)
+    if out_dir is None:
+        return np.stack(frames) if frames else np.empty((0, renderer.height, renderer.width, 3), dtype=np.uint8)
+    return len(indices)
+
+
+def render_frames(amplitudes, coords=None, phases=None, measured=None, out_dir=None, frames_per_step=1,
+                  workers=None, chunk_size=None, start_frame=0, continued=False, **view):
+    """Render one animation frame per step (and per transition frame) across a process pool.
+
+    amplitudes:      (N, 2) complex amplitudes of every step, used for the bra-ket label
+    coords, phases:  (N, 3) Bloch vectors and (N,) [0, 1) phases, computed from amplitudes if missing
+    measured:        (N,) bools, steps at or after a measurement get the "(measured)" label
+    out_dir:         write frame_000000.png... there and return the frame count, otherwise
+                     return an (F, H, W, 3) uint8 array (keep that for short animations)
+    frames_per_step: frames for the transition into each step
+    workers:         process count, defaults to os.cpu_count(). 1 renders in this process.
+    start_frame:     number of the first frame file, for rendering a long run in pieces
+    continued:       step 0 is the last step of the previous piece, already rendered, so
+                     only the transition out of it is
+    view:            FrameRenderer arguments, e.g. rot_x, rot_y, distance, pan_x, pan_y, width, height
+    """
+    amplitudes = np.asarray(amplitudes, dtype=np.complex128).reshape(-1, 2)
+    if coords is None or phases is None:
+        theta, phi = Qubit.amp_to_spherical(amplitudes[:, 0], amplitudes[:, 1])
+        coords = np.stack(Qubit.spherical_to_cartesian(theta, phi), axis=-1)
+        phases = phi / (2 * np.pi)
+    measured = np.zeros(len(amplitudes), dtype=bool) if measured is None else np.asarray(measured, dtype=bool)
+    vectors, steps = frame_states(coords, phases, frames_per_step)
+    if continued:
+        vectors, steps = vectors[1:], steps[1:]
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-len(vectors) // (workers * CHUNKS_PER_WORKER)))
+    starts = range(0, len(vectors), chunk_size)
+    chunks = [(view, vectors[start:start + chunk_size], amplitudes[steps[start:start + chunk_size]],
+               measured[steps[start:start + chunk_size]],
+               range(start_frame + start, start_frame + min(start + chunk_size, len(vectors))), out_dir)
+              for start in starts]
+
+    if workers == 1 or len(chunks) <= 1:
+        results = [_render_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map keeps frames in order
+            results = list(executor.map(_render_chunk, *zip(*chunks)))
+
+    if out_dir is not None:
+        return sum(results)
+    if not results:
+        return _render_chunk(view, [], [], [], [], None)
+    return np.concatenate(results)
+
+
+def _export(out, amplitudes, coords=None, phases=None, measured=None, fps=30, **options):
+    """Write frames to a .gif file, a .png file (last frame) or a directory of PNGs"""
+    extension = os.path.splitext(out)[1].lower()
+    if extension == '.gif':
+        require_pillow()
+        write_gif(out, render_frames(amplitudes, coords, phases, measured, **options), fps)
+    elif extension == '.png':
+        write_png(out, render_frames(amplitudes[-1:], None if coords is None else coords[-1:],
+                                     None if phases is None else phases[-1:],
+                                     None if measured is None else measured[-1:], **options)[0])
+    else:
+        return render_frames(amplitudes, coords, phases, measured, out_dir=out, **options)
+
+
+def export_circuit(circuit, out, amp_a=1+0j, amp_b=0+0j, **options):
+    """Render every step of a list of gate tuples to `out` (.gif, .png or a directory of PNGs)"""
+    return _export(out, step_amplitudes(circuit, amp_a, amp_b), **options)
+
+
+def export_trace(path, out, slice_size=TRACE_SLICE, fps=30, **options):
+    """Render a trace file recorded with tracefile.write_trace/TraceWriter to `out`
+
+    The memory-mapped records are read and rendered slice_size steps at a time,
+    so only one slice of a long trace is in memory (plus every frame for a .gif).
+    """
+    extension = os.path.splitext(out)[1].lower()
+    if extension == '.gif':
+        require_pillow()
+    records = open_trace(path).records
+    slices = range(0, len(records), slice_size)
+    if extension == '.png':
+        last = records[-1:]
+        measured = any(np.any(records['gate_id'][start:start + slice_size] == MEASURE_ID) for start in slices)
+        return _export(out, last['amplitudes'], last['xyz'], last['phase'], np.array([measured]), **options)
+
+    frames_per_step = max(options.pop('frames_per_step', 1), 1)
+    out_dir = None if extension == '.gif' else out
+    results = []
+    was_measured = False
+    for start in slices:
+        # Every slice after the first starts on the previous slice's last step,
+        # where its first transition starts
+        first = max(start - 1, 0)
+        piece = records[first:start + slice_size]
+        measured = was_measured | np.logical_or.accumulate(piece['gate_id'] == MEASURE_ID)
+        was_measured = bool(measured[-1])
+        results.append(render_frames(piece['amplitudes'], piece['xyz'], piece['phase'], measured, out_dir,
+                                     frames_per_step, start_frame=0 if start == 0 else 1 + first * frames_per_step,
+                                     continued=start > 0, **options))
+
+    if out_dir is not None:
+        return sum(results)
+    write_gif(out, np.concatenate(results), fps)
+
+
+if __name__ == "__main__":
+    import sys
+    assert len(sys.argv) == 3, "usage: python rasterizer.py TRACE_FILE OUT(.gif|.png|directory)"
+    export_trace(sys.argv[1], sys.argv[2])
@@ -0,0 +1,157 @@
+import numpy as np
+
+import gates
+import sampling
+
+
+# Largest number of amplitudes touched per ufunc call. Gates are applied block
+# by block so scratch memory stays fixed no matter how many qubits there are.
+CHUNK_SIZE = 1 << 16
+
+
+class QubitRegister:
+    '''
+    n-qubit state vector simulator.
+
+    The state is a single complex128 array of 2^n amplitudes. Qubit k is bit k of
+    the basis index (qubit 0 is the least significant bit). Gates reshape the
+    state to a (2,)*n tensor and only update the slices along the target axis,
+    so a full 2^n x 2^n operator is never built.
+    '''
+
+    def __init__(self, n_qubits):
+        assert n_qubits >= 1, "A register needs at least one qubit"
+        self.n_qubits = n_qubits
+        self.state = np.zeros(1 << n_qubits, dtype=np.complex128)
+        self.state[0] = 1  # |00...0>
+        self._distribution = None
+        self._scratch = np.empty((2, min(max(CHUNK_SIZE, 2), 1 << (n_qubits - 1))), dtype=np.complex128)
+
+    def __len__(self):
+        return self.n_qubits
+
+    def _axis(self, qubit):
+        assert 0 <= qubit < self.n_qubits, f"Qubit index {qubit} out of range for {self.n_qubits} qubits"
+        return self.n_qubits - 1 - qubit
+
+    #GATE OPERATIONS
+    def apply(self, matrix, target, controls=()):
+        """Apply a 2x2 unitary to `target`, only where every qubit in `controls` is 1"""
+        index_0 = [slice(None)] * self.n_qubits
+        for control in controls:
+            assert control != target, "A qubit can't control itself"
+            index_0[self._axis(control)] = 1
+        index_1 = list(index_0)
+        index_0[self._axis(target)] = 0
+        index_1[self._axis(target)] = 1
+
+        self._distribution = None
+        tensor = self.state.reshape((2,) * self.n_qubits)
+        # Basic indexing only (the trailing Ellipsis keeps 0-d results as views),
+        # so both halves alias self.state
+        self._update(tensor[(*index_0, Ellipsis)], tensor[(*index_1, Ellipsis)], matrix)
+        return self
+
+    def _update(self, amp_0, amp_1, matrix):
+        m00, m01 = matrix[0]
+        m10, m11 = matrix[1]
+        if m01 == 0 and m10 == 0:
+            # diagonal gates scale each half in place, no scratch needed
+            if m00 != 1:
+                amp_0 *= m00
+            if m11 != 1:
+                amp_1 *= m11
+            return
+        if amp_0.size > CHUNK_SIZE and amp_0.ndim > 1:
+            # Peel the leading axis until a block fits in the scratch buffers
+            for i in range(amp_0.shape[0]):
+                self._update(amp_0[i], amp_1[i], matrix)
+            return
+
+        size = amp_0.size
+        tmp_0 = self._scratch[0, :size].reshape(amp_0.shape)
+        tmp_1 = self._scratch[1, :size].reshape(amp_0.shape)
+        np.multiply(amp_0, m10, out=tmp_0)
+        np.multiply(amp_1, m01, out=tmp_1)
+        amp_0 *= m00
+        amp_0 += tmp_1
+        amp_1 *= m11
+        amp_1 += tmp_0
+
+    def h(self, target):
+        return self.apply(gates.H, target)
+
+    def x(self, target):
+        return self.apply(gates.X, target)
+
+    def y(self, target):
+        return self.apply(gates.Y, target)
+
+    def z(self, target):
+        return self.apply(gates.Z, target)
+
+    def p(self, angle, target):
+        return self.apply(gates.p(angle), target)
+
+    def s(self, target):
+        return self.apply(gates.S, target)
+
+    def t(self, target):
+        return self.apply(gates.T, target)
+
+    def ry(self, angle, target):
+        return self.apply(gates.ry(angle), target)
+
+    def rz(self, angle, target):
+        return self.apply(gates.rz(angle), target)
+
+    def cx(self, control, target):
+        return self.apply(gates.X, target, controls=(control,))
+
+    def cz(self, control, target):
+        return self.apply(gates.Z, target, controls=(control,))
+
+    def cp(self, angle, control, target):
+        return self.apply(gates.p(angle), target, controls=(control,))
+
+    def ccx(self, control_a, control_b, target):
+        return self.apply(gates.X, target, controls=(control_a, control_b))
+
+    # PRINTING AND REPRESENTATIONS
+
+    def probabilities(self):
+        return np.abs(self.state)**2
+
+    def sample(self, shots, rng=None, counts=False):
+        """Draw `shots` basis state indices without collapsing the register
+
+        Returns a compact unsigned integer array of outcomes, or with counts=True
+        the number of shots per basis state. rng takes a seed, SeedSequence or Generator.
+        """
+        return self.distribution().sample(shots, rng, counts)
+
+    def distribution(self):
+        """Measurement distribution over basis states, cached until the next gate.
+        Call invalidate() after writing to self.state directly."""
+        if self._distribution is None:
+            self._distribution = sampling.MeasurementDistribution(self.probabilities())
+        return self._distribution
+
+    def invalidate(self):
+        self._distribution = None
+
+    def qubit_amplitudes(self, qubit):
+        """Reduced (amp_a, amp_b) of one qubit, only meaningful when it isn't entangled"""
+        tensor = self.state.reshape((2,) * self.n_qubits)
+        axis = self._axis(qubit)
+        amps = np.moveaxis(tensor, axis, 0).reshape(2, -1)
+        # Pick the basis column with the most weight and renormalize it
+        column = np.argmax(np.abs(amps[0])**2 + np.abs(amps[1])**2)
+        amp_a, amp_b = amps[:, column]
+        norm = np.sqrt(abs(amp_a)**2 + abs(amp_b)**2)
+        return (amp_a / norm, amp_b / norm)
+
+    def __str__(self):
+        width = self.n_qubits
+        terms = [f"({amp:.3g})|{index:0{width}b}>" for index, amp in enumerate(self.state) if abs(amp) > 1e-10]
+        return f"Register ({self.n_qubits} qubits): " + " + ".join(terms[:16]) + (" + ..." if len(terms) > 16 else "")
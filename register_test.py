@@ -0,0 +1,68 @@
+import numpy as np
+
+import gates
+import register
+from register import QubitRegister
+
+
+def kron_operator(matrix, target, n_qubits, controls=()):
+    """Full 2^n x 2^n operator built with Kronecker products, qubit 0 is the least significant bit"""
+    def kron_all(factors):  # factors[k] acts on qubit k
+        result = np.ones((1, 1))
+        for factor in reversed(factors):
+            result = np.kron(result, factor)
+        return result
+
+    identity = [np.eye(2)] * n_qubits
+    p1 = np.diag([0, 1])
+    # I everywhere except where every control is 1, there apply matrix to target
+    controlled = list(identity)
+    for control in controls:
+        controlled[control] = p1
+    idle = kron_all(controlled)
+    controlled[target] = matrix
+    return np.eye(1 << n_qubits) - idle + kron_all(controlled)
+
+
+def random_state(n_qubits, seed=0):
+    rng = np.random.default_rng(seed)
+    state = rng.normal(size=1 << n_qubits) + 1j * rng.normal(size=1 << n_qubits)
+    return state / np.linalg.norm(state)
+
+
+def check_against_kron(n_qubits):
+    reg = QubitRegister(n_qubits)
+    reg.state[:] = random_state(n_qubits)
+    expected = reg.state.copy()
+    ops = [(gates.H, 0, ()), (gates.rx(0.7), n_qubits - 1, ()), (gates.T, 1, ()),
+           (gates.X, 2, (0,)), (gates.ry(1.3), 0, (1, n_qubits - 1)), (gates.Z, n_qubits - 1, (2,))]
+    for matrix, target, controls in ops:
+        reg.apply(matrix, target, controls)
+        expected = kron_operator(matrix, target, n_qubits, controls) @ expected
+        assert np.allclose(reg.state, expected), f"Mismatch after {matrix.tolist()} on {target} controlled by {controls}"
+
+
+def test_apply_matches_kron():
+    check_against_kron(4)
+
+
+def test_chunked_apply_matches_kron():
+    # A tiny chunk size makes every non-diagonal gate go through the blockwise path
+    chunk_size = register.CHUNK_SIZE
+    register.CHUNK_SIZE = 4
+    try:
+        check_against_kron(6)
+    finally:
+        register.CHUNK_SIZE = chunk_size
+
+
+def test_bell_state():
+    reg = QubitRegister(2).h(0).cx(0, 1)
+    assert np.allclose(reg.probabilities(), [0.5, 0, 0, 0.5])
+
+
+if __name__ == "__main__":
+    test_apply_matches_kron()
+    test_chunked_apply_matches_kron()
+    test_bell_state()
+    print("register tests passed")
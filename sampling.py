@@ -0,0 +1,73 @@
+import numpy as np
+
+# Distributions with more outcomes than this sort their uniform draws before searching
+SORTED_SEARCH_THRESHOLD = 4096
+
+
+def make_rng(rng=None):
+    """Turn None, an int seed, a SeedSequence or a Generator into a numpy Generator"""
+    return np.random.default_rng(rng)
+
+
+def spawn_rngs(seed, count):
+    """Independent, reproducible Generators for `count` parallel workers"""
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [np.random.default_rng(child) for child in seed.spawn(count)]
+
+
+def outcome_dtype(n_outcomes):
+    """Smallest unsigned integer type that can hold every outcome index"""
+    return np.min_scalar_type(max(n_outcomes - 1, 0))
+
+
+class MeasurementDistribution:
+    """Outcome distribution of a state, built once and sampled many times
+
+    The normalized cumulative sum is computed on construction, after which each
+    shot is one uniform draw and a binary search (searchsorted), done in bulk.
+    """
+
+    def __init__(self, probabilities):
+        probabilities = np.asarray(probabilities, dtype=np.float64).ravel()
+        self.cdf = np.cumsum(probabilities)
+        total = self.cdf[-1]
+        assert total > 0, "Can't sample from an all-zero distribution"
+        self.cdf /= total
+        self.probabilities = probabilities / total
+        self.dtype = outcome_dtype(probabilities.size)
+
+    @classmethod
+    def from_amplitudes(cls, amplitudes):
+        return cls(np.abs(np.asarray(amplitudes))**2)
+
+    def __len__(self):
+        return self.cdf.size
+
+    def sample(self, shots, rng=None, counts=False):
+        """Outcome indices as a compact unsigned array, or per-outcome counts with counts=True"""
+        rng = make_rng(rng)
+        if counts:
+            return rng.multinomial(shots, self.probabilities)
+        uniforms = rng.random(shots)
+        if self.cdf.size > SORTED_SEARCH_THRESHOLD:
+            # Sorted queries walk the cdf in order, which is far more cache friendly
+            # for large registers. Shuffling afterwards restores independent order.
+            uniforms.sort()
+            outcomes = np.searchsorted(self.cdf, uniforms, side='right')
+            rng.shuffle(outcomes)
+        else:
+            outcomes = np.searchsorted(self.cdf, uniforms, side='right')
+        # guard against the last cdf entry rounding to just under 1
+        np.minimum(outcomes, self.cdf.size - 1, out=outcomes)
+        return outcomes.astype(self.dtype, copy=False)
+
+
+def sample(probabilities, shots, rng=None, counts=False):
+    """Draw `shots` outcome indices from a probability vector in one vectorized call
+
+    Returns the outcomes as a compact unsigned integer array, or with counts=True
+    an array holding how many shots landed on each outcome. Build a
+    MeasurementDistribution instead when sampling the same state repeatedly.
+    """
+    return MeasurementDistribution(probabilities).sample(shots, rng, counts)
@@ -0,0 +1,86 @@
+import numpy as np
+
+# Shapes of the Bloch sphere scene as plain numpy vertex arrays in GL space
+# (Bloch x, y, z -> GL x, z, y), shared by the pyglet geometry and the
+# headless rasterizer. Lines are (start, end) vertex pairs like GL_LINES.
+
+# Equator, prime meridian and another meridian
+SPHERE_CIRCLES = (('z', (0.5, 0.5, 0.5)), ('y', (0.4, 0.4, 0.4)), ('x', (0.4, 0.4, 0.4)))
+CIRCLE_WIDTH = 1.5
+AXIS_WIDTH = 2.5
+ARROW_WIDTH = 4.0
+ARROW_COLOR = (1.0, 0.8, 0.0)
+
+
+def circle_segments(radius, segments, axis):
+    """(2*segments, 3) GL_LINES vertices of a circle around `axis`, same planes as the old draw_circle"""
+    theta = 2.0 * np.pi * np.arange(segments) / segments
+    a = radius * np.cos(theta)
+    b = radius * np.sin(theta)
+    zero = np.zeros(segments)
+    points = {
+        'z': (a, zero, b),  # Circle in XZ plane of GL space (Bloch equator)
+        'y': (a, b, zero),
+        'x': (zero, a, b),
+    }[axis]
+    points = np.stack(points, axis=-1)
+    # each segment joins point i to point i+1, wrapping around to close the loop
+    return np.stack((points, np.roll(points, -1, axis=0)), axis=1).reshape(-1, 3)
+
+
+def sphere_circles(radius=1.0, segments=64):
+    """(6*segments, 3) vertices and matching RGB colors of the sphere's three circles"""
+    vertices = np.concatenate([circle_segments(radius, segments, axis) for axis, _ in SPHERE_CIRCLES])
+    colors = np.concatenate([np.tile(color, (2 * segments, 1)) for _, color in SPHERE_CIRCLES])
+    return vertices, colors
+
+
+def sphere_axes(radius=1.0):
+    """(6, 3) vertices and RGB colors of the axes through the sphere: X red, Y blue, Z green (Z is GL's y)"""
+    length = radius * 1.2
+    vertices = np.array([
+        (-length, 0.0, 0.0), (length, 0.0, 0.0),
+        (0.0, 0.0, -length), (0.0, 0.0, length),
+        (0.0, -length, 0.0), (0.0, length, 0.0),
+    ])
+    colors = np.repeat([(0.8, 0.2, 0.2), (0.2, 0.2, 0.8), (0.2, 0.8, 0.2)], 2, axis=0)
+    return vertices, colors
+
+
+def arrow_vertices(vectors, length=1.15, arrow_length=0.1):
+    """(N, 6, 3) GL_LINES vertices of Bloch vector arrows: shaft, left wing, right wing
+
+    Same shape as the original immediate-mode main.draw_state_vector: the vector is
+    normalized and extended to `length`, Bloch (x, y, z) maps to GL (x, z, y),
+    and the wings sit arrow_length back from the tip. Zero vectors collapse
+    to the origin.
+    """
+    vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, 3)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    tips = np.where(norms > 1e-6, vectors / np.where(norms > 1e-6, norms, 1.0) * length, vectors)
+    tips = tips[:, [0, 2, 1]]  # to GL space
+
+    tip_norms = np.linalg.norm(tips, axis=-1, keepdims=True)
+    has_head = tip_norms[:, 0] > 1e-6
+    directions = tips / np.where(has_head, tip_norms[:, 0], 1.0)[:, np.newaxis]
+    bases = tips - directions * arrow_length
+
+    # Wings are perpendicular to the direction and to GL's up, or to x when pointing along up
+    along_up = (np.abs(directions[:, 0]) < 1e-6) & (np.abs(directions[:, 2]) < 1e-6)
+    up = np.where(along_up[:, np.newaxis], (1.0, 0.0, 0.0), (0.0, 1.0, 0.0))
+    perps = np.cross(directions, up)
+    perp_norms = np.linalg.norm(perps, axis=-1, keepdims=True)
+    has_head &= perp_norms[:, 0] > 1e-6
+    wings = perps / np.where(perp_norms > 1e-6, perp_norms, 1.0) * (arrow_length * 0.5)
+
+    arrows = np.empty((len(vectors), 6, 3))
+    arrows[:, 0] = 0.0
+    arrows[:, 1] = tips
+    arrows[:, 2] = tips
+    arrows[:, 3] = bases + wings
+    arrows[:, 4] = tips
+    arrows[:, 5] = bases - wings
+    # Without a head, the wing lines have zero length at the tip
+    arrows[~has_head, 3] = tips[~has_head]
+    arrows[~has_head, 5] = tips[~has_head]
+    return arrows
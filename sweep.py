@@ -0,0 +1,70 @@
+import numpy as np
+
+from gates import BATCH_GATES, gate_matrix, I
+from qubit import Qubit
+
+
+class Parameter:
+    """Named placeholder for a gate angle, e.g. ('RY', Parameter('theta'))"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Parameter({self.name!r})"
+
+
+class SweepResult:
+    """Final states of a sweep, every array has the broadcast parameter shape in front"""
+
+    def __init__(self, amplitudes):
+        self.amplitudes = amplitudes  # (..., 2) complex
+        self.probabilities = np.abs(amplitudes)**2  # (..., 2)
+        self.coords = np.stack(Qubit.amp_to_cartesian(amplitudes[..., 0], amplitudes[..., 1]), axis=-1)  # (..., 3)
+
+    def __len__(self):
+        return len(self.amplitudes)
+
+
+def _lookup(values, parameter):
+    if parameter in values:
+        return values[parameter]
+    assert parameter.name in values, f"No values given for {parameter}"
+    return values[parameter.name]
+
+
+def sweep(circuit, values, amp_a=1+0j, amp_b=0+0j):
+    """Run one circuit for every point of a parameter grid in a single batched pass.
+
+    circuit: list of gate tuples where angles may be Parameter objects,
+             e.g. [('H',), ('RY', theta), ('RZ', phi)]
+    values:  {Parameter or parameter name: array of angles}. The arrays are
+             broadcast together, so 1-D arrays of n_points give results of
+             shape (n_points, ...) and meshgrid arrays give a grid.
+    """
+    parameters = {param for gate_op in circuit for param in gate_op[1:] if isinstance(param, Parameter)}
+    arrays = {param: np.asarray(_lookup(values, param), dtype=np.float64) for param in parameters}
+    shape = np.broadcast_shapes(*(array.shape for array in arrays.values()))
+
+    state = np.empty(shape + (2,), dtype=np.complex128)
+    state[..., 0] = amp_a
+    state[..., 1] = amp_b
+
+    # Runs of gates without parameters are fused into one fixed matrix
+    fixed = I
+    for gate_op in circuit:
+        name, params = gate_op[0], gate_op[1:]
+        if not any(isinstance(param, Parameter) for param in params):
+            fixed = gate_matrix(name, *params) @ fixed
+            continue
+        if fixed is not I:
+            state = state @ fixed.T
+            fixed = I
+        builder = BATCH_GATES.get(name.lower())
+        assert builder is not None, f"Gate {name} has no angle to sweep"
+        matrices = builder(np.broadcast_to(arrays[params[0]], shape))
+        state = np.einsum('...ij,...j->...i', matrices, state)
+    if fixed is not I:
+        state = state @ fixed.T
+
+    return SweepResult(state)
@@ -0,0 +1,140 @@
+import pyglet
+from pyglet.gl import *
+
+from button import Button
+from geometry import LineWidthGroup
+
+# Side of one spatial index cell in pixels, about the size of a button
+CELL_SIZE = 64
+
+BUTTON_COLOR = (0.2, 0.2, 0.4, 0.8)
+HOVER_COLOR = (0.3, 0.3, 0.5, 0.9)
+BORDER_COLOR = (0.6, 0.6, 0.8)
+
+
+class Toolbar:
+    """Buttons drawn together from one Batch, with a grid index for hit tests
+
+    Every button adds a quad, its border lines and its label to the shared
+    batch, so drawing the whole toolbar is one 2D projection setup and one
+    batch.draw(). Buttons are also bucketed into CELL_SIZE grid cells, so
+    hover and click only test the buttons in the cell under the cursor.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.buttons = []
+        self.visible = []
+        self.hovered = None  # index of the hovered button
+        self.batch = pyglet.graphics.Batch()
+        self.label_group = pyglet.graphics.OrderedGroup(2)
+        self._quad_group = pyglet.graphics.OrderedGroup(0)
+        self._border_group = LineWidthGroup(4.0, 1)
+        self._cells = {}
+        self._quads = []
+        self._borders = []
+
+    def __len__(self):
+        return len(self.buttons)
+
+    def button(self, x, y, width, height, text, action):
+        """Create a Button whose label lives in this toolbar's batch and add it"""
+        button = Button(x, y, width, height, text, action, batch=self.batch, group=self.label_group)
+        self.add(button)
+        return button
+
+    def add(self, button):
+        """Add a Button, returns its index"""
+        index = len(self.buttons)
+        self.buttons.append(button)
+        self.visible.append(True)
+        self._quads.append(self.batch.add(4, GL_QUADS, self._quad_group, 'v2f/dynamic', 'c4f/dynamic'))
+        self._borders.append(self.batch.add(8, GL_LINES, self._border_group, 'v2f/dynamic', ('c3f/static', BORDER_COLOR * 8)))
+        self._update_vertices(index)
+        self._update_color(index)
+        for cell in self._cells_of(button):
+            self._cells.setdefault(cell, []).append(index)
+        return index
+
+    def _cells_of(self, button):
+        size = self.cell_size
+        for cx in range(int(button.x // size), int((button.x + button.width) // size) + 1):
+            for cy in range(int(button.y // size), int((button.y + button.height) // size) + 1):
+                yield (cx, cy)
+
+    def hit(self, x, y):
+        """Index of the first visible button containing (x, y), or None"""
+        candidates = self._cells.get((int(x // self.cell_size), int(y // self.cell_size)), ())
+        for index in candidates:
+            if self.visible[index] and self.buttons[index].contains(x, y):
+                return index
+        return None
+
+    def click(self, x, y):
+        """Run the action of the button under (x, y), returns True if there was one"""
+        index = self.hit(x, y)
+        if index is None:
+            return False
+        self.buttons[index].action()
+        return True
+
+    def hover(self, x, y):
+        """Highlight the button under (x, y), returns True if the highlight changed"""
+        index = self.hit(x, y)
+        if index == self.hovered:
+            return False
+        previous, self.hovered = self.hovered, index
+        for i in (previous, index):
+            if i is not None:
+                self.buttons[i].hovered = i == index
+                self._update_color(i)
+        return True
+
+    def set_visible(self, index, visible):
+        """Show or hide one button, hidden buttons are skipped by draw and hit tests"""
+        if self.visible[index] == visible:
+            return
+        self.visible[index] = visible
+        if index == self.hovered and not visible:
+            self.hovered = None
+            self.buttons[index].hovered = False
+            self._update_color(index)
+        self._update_vertices(index)
+        button = self.buttons[index]
+        if hasattr(button, 'label'):
+            # A label without a batch falls back to its own, which is never drawn
+            button.label.batch = self.batch if visible else None
+
+    def _update_vertices(self, index):
+        button = self.buttons[index]
+        x0, y0 = button.x, button.y
+        x1, y1 = x0 + button.width, y0 + button.height
+        if not self.visible[index]:
+            x1, y1 = x0, y0  # degenerate quad and lines, nothing is rasterized
+        self._quads[index].vertices[:] = [x0, y0, x1, y0, x1, y1, x0, y1]
+        # Border as 4 line segments closing the loop
+        self._borders[index].vertices[:] = [x0, y0, x1, y0, x1, y0, x1, y1,
+                                            x1, y1, x0, y1, x0, y1, x0, y0]
+
+    def _update_color(self, index):
+        color = HOVER_COLOR if self.buttons[index].hovered else BUTTON_COLOR
+        self._quads[index].colors[:] = color * 4
+
+    def draw(self, width, height):
+        """Draw every visible button in one 2D pass over a width x height window"""
+        glDisable(GL_DEPTH_TEST)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, width, 0, height, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        self.batch.draw()
+
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glEnable(GL_DEPTH_TEST)
@@ -0,0 +1,170 @@
+import os
+import numpy as np
+
+from checkpoints import MEASURE_ID
+from circuit import encode_circuit, decode_matrices
+from gates import GATE_NAMES
+from qubit import Qubit
+
+# File layout: one HEADER_DTYPE header followed by fixed-width RECORD_DTYPE
+# records, all little endian. Record i is the state after i gates.
+MAGIC = b'QCTRACE'  # NUL padded to 8 bytes on disk
+VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u2'),
+    ('header_size', '<u2'),
+    ('record_size', '<u4'),
+    ('count', '<u8'),  # filled in on close, readers trust the file size
+    ('reserved', 'V8'),
+])
+
+RECORD_DTYPE = np.dtype([
+    ('amplitudes', '<c16', (2,)),
+    ('xyz', '<f8', (3,)),
+    ('phase', '<f8'),  # phi / 2pi, same as the 4th value of main.qubit_state
+    ('param', '<f8'),  # gate angle, nan for fixed gates
+    ('gate_id', '<u2'),  # gates.GATE_IDS, checkpoints.MEASURE_ID or NO_GATE
+    ('reserved', 'V6'),
+])
+
+# gate_id of the initial record, which no gate produced
+NO_GATE = 0xFFFF
+
+# Records buffered in memory before a TraceWriter writes to disk
+WRITE_BUFFER_SIZE = 4096
+
+
+def _records(amplitudes, gate_ids, params):
+    """Fill RECORD_DTYPE rows from (M, 2) amplitudes, deriving coords and phase"""
+    records = np.zeros(len(amplitudes), dtype=RECORD_DTYPE)
+    records['amplitudes'] = amplitudes
+    theta, phi = Qubit.amp_to_spherical(amplitudes[:, 0], amplitudes[:, 1])
+    records['xyz'] = np.stack(Qubit.spherical_to_cartesian(theta, phi), axis=-1)
+    records['phase'] = phi / (2 * np.pi)
+    records['param'] = params
+    records['gate_id'] = gate_ids
+    return records
+
+
+class TraceWriter:
+    """Append-only writer for trace files, use as a context manager or call close()"""
+
+    def __init__(self, path):
+        self._file = open(path, 'wb')
+        self._count = 0
+        self._buffer = []
+        self._file.write(self._header().tobytes())
+
+    def _header(self):
+        header = np.zeros((), dtype=HEADER_DTYPE)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['header_size'] = HEADER_DTYPE.itemsize
+        header['record_size'] = RECORD_DTYPE.itemsize
+        header['count'] = self._count
+        return header
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, amp_a, amp_b, gate_id=NO_GATE, param=np.nan):
+        """Add the state reached by gate `gate_id`"""
+        self._buffer.append((amp_a, amp_b, gate_id, param))
+        if len(self._buffer) >= WRITE_BUFFER_SIZE:
+            self.flush()
+
+    def extend(self, amplitudes, gate_ids, params):
+        """Add many states at once from (M, 2) amplitudes and (M,) gate ids and angles"""
+        self.flush()
+        records = _records(np.asarray(amplitudes, dtype=np.complex128).reshape(-1, 2), gate_ids, params)
+        self._file.write(records.tobytes())
+        self._count += len(records)
+
+    def flush(self):
+        if self._buffer:
+            amp_a, amp_b, gate_ids, params = zip(*self._buffer)
+            self._buffer = []
+            self.extend(np.stack((amp_a, amp_b), axis=-1), gate_ids, params)
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.seek(0)
+        self._file.write(self._header().tobytes())
+        self._file.close()
+
+
+def write_trace(path, circuit, amp_a=1+0j, amp_b=0+0j, chunk_size=65536):
+    """Run a list of gate tuples and record every intermediate state to `path`"""
+    ids, params = encode_circuit(circuit)
+    vector = np.array([amp_a, amp_b], dtype=np.complex128)
+    with TraceWriter(path) as writer:
+        writer.append(vector[0], vector[1])
+        for start in range(0, len(ids), chunk_size):
+            matrices = decode_matrices(ids[start:start + chunk_size], params[start:start + chunk_size])
+            amplitudes = np.empty((len(matrices), 2), dtype=np.complex128)
+            for i, matrix in enumerate(matrices):
+                vector = matrix @ vector
+                amplitudes[i] = vector
+            writer.extend(amplitudes, ids[start:start + chunk_size], params[start:start + chunk_size])
+
+
+class Trace:
+    """Read-only, memory-mapped view of a trace file
+
+    Opening is O(1) whatever the file size, pages are only read when touched.
+    Indexing gives [x, y, z, phase] like main.steps, so a Trace can be
+    played directly by the visualizer. The raw rows are in `records`.
+    """
+
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        assert len(header) == 1 and header['magic'][0] == MAGIC, f"{path} is not a trace file"
+        assert header['version'][0] <= VERSION, f"Trace version {header['version'][0]} is newer than supported {VERSION}"
+        assert header['record_size'][0] == RECORD_DTYPE.itemsize, "Trace record size doesn't match this version"
+        self.path = path
+        offset = int(header['header_size'][0])
+        # Trust the file size over the header count, a crashed writer never rewrote it.
+        # A partially written last record is ignored.
+        count = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        record = self.records[index]
+        x, y, z = record['xyz']
+        return [x, y, z, record['phase']]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def amplitudes(self, index):
+        amp_a, amp_b = self.records[index]['amplitudes']
+        return (amp_a, amp_b)
+
+    def gate(self, index):
+        """Gate tuple that produced record `index`, None for the initial record"""
+        record = self.records[index]
+        gate_id = int(record['gate_id'])
+        if gate_id == NO_GATE:
+            return None
+        if gate_id == MEASURE_ID:
+            return ('measure', int(record['param']))
+        name = GATE_NAMES[gate_id]
+        return (name,) if np.isnan(record['param']) else (name, float(record['param']))
+
+
+def open_trace(path):
+    return Trace(path)
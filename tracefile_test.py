@@ -0,0 +1,51 @@
+import os
+import tempfile
+import numpy as np
+
+from checkpoints import MEASURE_ID
+from gates import GATE_IDS
+from circuit import step_amplitudes
+from qubit import Qubit
+from tracefile import TraceWriter, open_trace, write_trace
+
+
+def test_write_read_round_trip():
+    circuit = [('h',), ('rx', 0.25), ('t',), ('ry', 1.5), ('s',)] * 20
+    expected = step_amplitudes(circuit)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'run.qctrace')
+        # a small chunk size exercises more than one extend()
+        write_trace(path, circuit, chunk_size=32)
+        trace = open_trace(path)
+
+        assert len(trace) == len(circuit) + 1
+        assert trace.gate(0) is None
+        assert trace.gate(2) == ('rx', 0.25)
+        assert trace.gate(3) == ('t',)
+        for index in (0, 1, 31, 32, 33, len(circuit)):
+            assert np.allclose(trace.amplitudes(index), expected[index])
+            x, y, z = Qubit.amp_to_cartesian(*expected[index])
+            phi = Qubit.amp_to_spherical(*expected[index])[1]
+            assert np.allclose(trace[index], [x, y, z, phi / (2 * np.pi)])
+        del trace
+
+
+def test_writer_append_and_measurement():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session.qctrace')
+        with TraceWriter(path) as writer:
+            writer.append(1, 0)
+            writer.append(np.sqrt(0.5), np.sqrt(0.5), gate_id=GATE_IDS['h'])
+            writer.append(0, 1, gate_id=MEASURE_ID, param=1.0)
+        trace = open_trace(path)
+        assert len(trace) == 3
+        assert trace.gate(1) == ('h',)
+        assert trace.gate(2) == ('measure', 1)
+        assert np.allclose(trace[2][:3], [0, 0, -1])
+        del trace
+
+
+if __name__ == "__main__":
+    test_write_read_round_trip()
+    test_writer_append_and_measurement()
+    print("trace tests passed")
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 def _normalize_vector(x, y, z):
     """Normalize a vector to unit length"""
@@ -85,4 +86,80 @@ def _slerp_standard(s_x, s_y, s_z, e_x, e_y, e_z, t, start_mag, end_mag):
     
     return ((a * s_x + b * e_x) * result_mag,
             (a * s_y + b * e_y) * result_mag,
-            (a * s_z + b * e_z) * result_mag)
\ No newline at end of file
+            (a * s_z + b * e_z) * result_mag)
+
+def _normalize_array(v):
+    """Normalize (N, 3) rows to unit length, zero rows stay zero"""
+    length = np.linalg.norm(v, axis=-1, keepdims=True)
+    return v / np.where(length < 1e-10, np.inf, length)
+
+def _slerp_standard_array(s, e, t, start_mag, end_mag):
+    """_slerp_standard for (N, 3) unit vectors s, e, t of shape (N, T) or (1, T) and (N,) magnitudes -> (N, T, 3)"""
+    dot = np.clip(np.sum(s * e, axis=-1), -1.0, 1.0)
+    theta = np.arccos(dot)[:, np.newaxis]
+    sin_theta = np.sin(theta)
+    
+    # Parallel rows keep the start direction instead of dividing by sin(theta) ~ 0
+    parallel = np.abs(sin_theta) < 1e-10
+    sin_theta = np.where(parallel, 1.0, sin_theta)
+    a = np.where(parallel, 1.0, np.sin((1.0 - t) * theta) / sin_theta)
+    b = np.where(parallel, 0.0, np.sin(t * theta) / sin_theta)
+    
+    result_mag = start_mag[:, np.newaxis] + (end_mag - start_mag)[:, np.newaxis] * t
+    return (a[..., np.newaxis] * s[:, np.newaxis] + b[..., np.newaxis] * e[:, np.newaxis]) * result_mag[..., np.newaxis]
+
+def slerp_via_axis_array(start, end, t, via_vector=None):
+    """
+    slerp_via_axis for many vectors and many t at once.
+    start, end: (N, 3) arrays (or a single (3,) vector, broadcast against the other).
+    t: (T,) sample grid shared by every vector, or (N, T) per vector.
+    via_vector: None, one (3,) direction, or (N, 3) directions.
+    Returns (N, T, 3) trajectories. The zero, parallel, anti-parallel and standard
+    cases are picked per vector with masks instead of branches.
+    """
+    start, end = np.broadcast_arrays(np.asarray(start, dtype=np.float64).reshape(-1, 3),
+                                     np.asarray(end, dtype=np.float64).reshape(-1, 3))
+    t = np.asarray(t, dtype=np.float64)
+    if t.ndim < 2:
+        t = t.reshape(1, -1)
+    
+    start_mag = np.linalg.norm(start, axis=-1)
+    end_mag = np.linalg.norm(end, axis=-1)
+    s = _normalize_array(start)
+    e = _normalize_array(end)
+    dot = np.clip(np.sum(s * e, axis=-1), -1.0, 1.0)
+    
+    # Zero vectors and nearly parallel pairs use linear interpolation
+    zero = (start_mag < 1e-10) | (end_mag < 1e-10)
+    linear = zero | (dot > 0.9995)
+    anti = ~zero & (dot < -0.9995)
+    
+    result = _slerp_standard_array(s, e, t, start_mag, end_mag)
+    
+    if anti.any():
+        # Anti-parallel: go through the via_vector or an automatic perpendicular
+        s_anti, e_anti = s[anti], e[anti]
+        t_anti = t[anti] if len(t) > 1 else t
+        if via_vector is None:
+            zeros = np.zeros(len(s_anti))
+            mid = np.where((np.abs(s_anti[:, 0]) < 0.9)[:, np.newaxis],
+                           np.stack((zeros, -s_anti[:, 2], s_anti[:, 1]), axis=-1),
+                           np.stack((-s_anti[:, 1], s_anti[:, 0], zeros), axis=-1))
+        else:
+            mid = np.broadcast_to(np.asarray(via_vector, dtype=np.float64), start.shape)[anti]
+        mid = _normalize_array(mid)
+        
+        # start -> axis over the first half, axis -> end over the second
+        first = _slerp_standard_array(s_anti, mid, t_anti * 2.0, start_mag[anti], start_mag[anti])
+        second = _slerp_standard_array(mid, e_anti, (t_anti - 0.5) * 2.0, end_mag[anti], end_mag[anti])
+        result[anti] = np.where((t_anti < 0.5)[..., np.newaxis], first, second)
+    
+    lerp = start[:, np.newaxis] + (end - start)[:, np.newaxis] * t[..., np.newaxis]
+    return np.where(linear[:, np.newaxis, np.newaxis], lerp, result)
+
+def slerp_trajectory(start, end, t, via_vector=None):
+    """
+    slerp_via_axis(*start, *end, t, via_vector) for every value of a (T,) array t at once.
+    Returns a (T, 3) array of points, so a whole transition is sampled in one call.
+    """
+    return slerp_via_axis_array(start, end, t, via_vector)[0]